@@ -10,23 +10,387 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from typing import Optional, Tuple
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, \
+    TimeoutError as FutureTimeoutError, wait
+from functools import lru_cache
+from os.path import join
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ovos_bus_client.message import Message
 from ovos_bus_client.session import Session, SessionManager
-from ovos_ddg_solver import DuckDuckGoSolver
-from ovos_utils import classproperty
+from ovos_config.locations import get_xdg_cache_save_path
+from ovos_utils import classproperty, create_daemon
 from ovos_utils.gui import can_use_gui
 from ovos_utils.process_utils import RuntimeRequirements
 from ovos_workshop.decorators import intent_handler, common_query
 from ovos_workshop.intents import IntentBuilder
 from ovos_workshop.skills.ovos import OVOSSkill
 
+from .backends import make_backend
+from .breaker import CircuitBreaker, CircuitOpenError, UpstreamError
+from .cache import AnswerCache, QueryHistory
+from .images import ImageCache
+from .lookup import AsyncLookupEngine, SingleFlight
+from .metrics import SkillMetrics
+from .normalize import QueryNormalizer
+from .ratelimit import BACKGROUND, RateLimiter, request_priority
+from .results import Result, compact_results
+from .sessions import SessionStore
+from .snapshot import SnapshotError, export_snapshot, import_snapshot, read_manifest
+from .transport import make_http_session
+from .vocab import VocabMatcher
+
 
 class DuckDuckGoSkill(OVOSSkill):
     def initialize(self):
-        self.session_results = {}
-        self.duck = DuckDuckGoSolver()
+        start = time.perf_counter()
+        self.startup_times: Dict[str, float] = {}
+        self.session_results = SessionStore(
+            max_sessions=self.settings.get("max_sessions", 500),
+            ttl=self.settings.get("session_ttl", 900))
+        self.answer_cache = AnswerCache(
+            max_entries=self.settings.get("cache_size", 256),
+            ttl=self.settings.get("cache_ttl", 86400),
+            negative_ttl=self.settings.get("negative_cache_ttl", 300),
+            max_stale=max(self.settings.get("stale_if_error", 86400),
+                          self.revalidate_window),
+            backend=self._make_cache_backend(),
+            backend_retry=self.settings.get("cache_backend_retry", 30),
+            path=join(self.cache_dir, "answers.db")
+            if self.settings.get("disk_cache", False) else None)
+        self.normalizer = QueryNormalizer(intent_matcher=self.infobox_intent)
+        # rules and infobox intents are static, each phrase is matched once
+        self._normalize = lru_cache(maxsize=1024)(self.normalizer.normalize)
+        # one precompiled regex per language over all the gating vocab
+        self.vocab_matcher = VocabMatcher(
+            self.voc_list, ("MiscBlacklist", "Weather"),
+            on_invalidate=lambda lang: self.is_blacklisted.cache_clear())
+        for lang in [self.core_lang] + self.secondary_langs:
+            self.vocab_matcher.compile(lang)
+        # remember which phrases were rejected until the vocab changes
+        self.is_blacklisted = lru_cache(maxsize=1024)(self._is_blacklisted)
+        self.inflight = SingleFlight()
+        self.fanout_wins = Counter()
+        self._revalidating = set()
+        self._revalidate_lock = Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.settings.get("max_workers", 4),
+            thread_name_prefix="ddg")
+        # cache refresh and prefetch wait behind interactive requests on the
+        # rate limiter, they must not hold the lookup workers while doing so
+        self.background = ThreadPoolExecutor(
+            max_workers=self.settings.get("background_workers", 2),
+            thread_name_prefix="ddg-bg")
+        self.breaker = CircuitBreaker(
+            failure_threshold=self.settings.get("circuit_failures", 5),
+            reset_timeout=self.settings.get("circuit_reset", 30),
+            on_state_change=self.on_circuit_change)
+        self.http = self._make_http_session()
+        self.limiter = self._make_limiter()
+        # the solver and its dependencies are only imported on first use
+        self._duck = None
+        self._duck_lock = Lock()
+        self.image_cache = None
+        if self.settings.get("image_cache", False):
+            self.image_cache = ImageCache(
+                join(self.cache_dir, "images"),
+                max_bytes=self.settings.get("image_cache_mb", 50) * 1024 * 1024,
+                max_size=self.settings.get("image_size", (800, 480)),
+                session=self.http,
+                timeout=self.http_timeout,
+                limiter=self.limiter)
+        self.engine = None
+        if self.settings.get("async_lookups", False):
+            self.engine = AsyncLookupEngine(solver_factory=self.load_solver,
+                                            max_in_flight=self.settings.get("max_in_flight", 32))
+        self.settings_change_callback = self.on_settings_changed
+        self._stopping = Event()
+        self.query_history = None
+        if self.settings.get("warmup_queries", 0):
+            self.query_history = QueryHistory(join(self.cache_dir, "history.json"))
+            create_daemon(self.warmup_cache)
+        self.metrics = SkillMetrics()
+        self.add_event("ovos.ddg.metrics.get", self.handle_metrics_request)
+        self.add_event("ovos.ddg.batch_query", self.handle_batch_query)
+        self.add_event("ovos.ddg.cache.export", self.handle_export_snapshot)
+        self.add_event("ovos.ddg.cache.import", self.handle_import_snapshot)
+        if self.settings.get("cache_snapshot"):
+            create_daemon(self.import_cache_snapshot, (self.settings["cache_snapshot"],))
+        if self.settings.get("metrics_interval", 0):
+            self.schedule_repeating_event(self.report_metrics, None,
+                                          self.settings["metrics_interval"],
+                                          name="DDGMetrics")
+        if self.settings.get("prewarm_solver", False):
+            create_daemon(self.prewarm_solver)
+        self.startup_times["initialize"] = time.perf_counter() - start
+
+    @property
+    def duck(self):
+        """the DuckDuckGo solver, built on first access"""
+        return self._duck if self._duck is not None else self.load_solver()
+
+    @duck.setter
+    def duck(self, solver):
+        self._duck = solver
+
+    def load_solver(self):
+        with self._duck_lock:
+            if self._duck is None:
+                start = time.perf_counter()
+                from .solver import PooledDuckDuckGoSolver
+                self._duck = PooledDuckDuckGoSolver(session=self.http,
+                                                    timeout=self.http_timeout,
+                                                    breaker=self.breaker,
+                                                    limiter=self.limiter)
+                self.startup_times["solver"] = time.perf_counter() - start
+                self.log.debug(f"DDG solver loaded in {self.startup_times['solver']:.3f}s")
+            return self._duck
+
+    def prewarm_solver(self):
+        """load the solver in the background so the first question does not wait for it"""
+        if self._stopping.wait(self.settings.get("prewarm_delay", 10)):
+            return
+        self.load_solver()
+
+    def _make_cache_backend(self):
+        """shared answer cache from the `cache_backend` setting, None for memory only"""
+        spec = self.settings.get("cache_backend")
+        if not spec:
+            return None
+        try:
+            return make_backend(spec, token=self.settings.get("cache_token") or None)
+        except Exception as e:
+            self.log.error(f"DDG cache backend '{spec}' unavailable, using memory only: {e}")
+            return None
+
+    def _make_limiter(self) -> Optional[RateLimiter]:
+        """outbound request throttle, None if `rate_limit` is 0"""
+        rate = self.settings.get("rate_limit", 0)
+        if not rate or rate <= 0:
+            return None
+        return RateLimiter(rate=rate,
+                           burst=self.settings.get("rate_limit_burst", 5),
+                           max_wait=self.settings.get("rate_limit_max_wait", 10))
+
+    def _make_http_session(self):
+        return make_http_session(pool_size=self.settings.get("http_pool_size", 10),
+                                 retries=self.settings.get("http_retries", 2),
+                                 backoff=self.settings.get("http_backoff", 0.3))
+
+    @property
+    def http_timeout(self) -> Tuple[float, float]:
+        return (self.settings.get("http_connect_timeout", 3.05),
+                self.settings.get("http_read_timeout", 10))
+
+    def on_settings_changed(self):
+        old_session = self.http
+        self.http = self._make_http_session()
+        if self._duck:
+            self._duck.session = self.http
+            self._duck.timeout = self.http_timeout
+        if self.image_cache:
+            self.image_cache.session = self.http
+            self.image_cache.timeout = self.http_timeout
+        self.breaker.failure_threshold = self.settings.get("circuit_failures", 5)
+        self.breaker.reset_timeout = self.settings.get("circuit_reset", 30)
+        limiter = self._make_limiter()
+        if limiter and self.limiter:
+            # keep the queue and wait stats
+            self.limiter.rate, self.limiter.burst, self.limiter.max_wait = \
+                limiter.rate, limiter.burst, limiter.max_wait
+        else:
+            self.limiter = limiter
+            if self._duck:
+                self._duck.limiter = limiter
+            if self.image_cache:
+                self.image_cache.limiter = limiter
+        old_session.close()
+
+    def on_circuit_change(self, state: str, old_state: str):
+        """announce circuit breaker transitions, probe for recovery while open"""
+        self.log.info(f"DuckDuckGo circuit {old_state} -> {state}")
+        self.bus.emit(Message("ovos.ddg.circuit",
+                              {"state": state, "previous": old_state},
+                              {"skill_id": self.skill_id}))
+        if state == CircuitBreaker.OPEN:
+            self.schedule_event(self.probe_upstream, self.breaker.reset_timeout,
+                                name="DDGProbe")
+
+    def probe_upstream(self):
+        """half open probe, a failure re-opens the circuit and schedules the next one"""
+        if self.breaker.state == CircuitBreaker.CLOSED:
+            return
+        try:
+            with request_priority(BACKGROUND):
+                self.duck.get_data(self.settings.get("circuit_probe_query", "duckduckgo"),
+                                   lang=self.core_lang)
+        except CircuitOpenError:
+            # another request is probing, or the timer fired a bit early
+            self.schedule_event(self.probe_upstream, 1, name="DDGProbe")
+
+    @property
+    def revalidate_window(self) -> float:
+        """seconds past the soft ttl (`cache_ttl`) an answer is served while refreshed
+
+        answers older than the hard ttl (`cache_hard_ttl`) block on a new lookup
+        """
+        hard_ttl = self.settings.get("cache_hard_ttl", 0)
+        return max(0, hard_ttl - self.settings.get("cache_ttl", 86400)) if hard_ttl else 0
+
+    @property
+    def cache_dir(self) -> str:
+        return join(get_xdg_cache_save_path(), self.skill_id)
+
+    def warmup_cache(self):
+        """lookup the most popular past queries in the background
+
+        waits `warmup_delay` seconds after load, then fetches one query every
+        `warmup_interval` seconds, pausing while live lookups are in flight
+        """
+        if self._stopping.wait(self.settings.get("warmup_delay", 30)):
+            return
+        langs = [self.core_lang] + self.secondary_langs
+        interval = self.settings.get("warmup_interval", 1)
+        warmed = 0
+        for query, lang, units in self.query_history.top(self.settings["warmup_queries"], langs):
+            if self.answer_cache.has(query, lang, units):
+                continue
+            while self.inflight.in_flight() or (self.engine and self.engine.in_flight()):
+                if self._stopping.wait(0.1):
+                    return
+            try:
+                with request_priority(BACKGROUND):
+                    self.fetch_answer(query, lang, units)
+                warmed += 1
+            except Exception as e:
+                self.log.warning(f"DDG warm up failed for '{query}': {e}")
+            if self._stopping.wait(interval):
+                return
+        self.log.info(f"DDG cache warm up done, {warmed} queries fetched")
+
+    # snapshots
+    def import_cache_snapshot(self, path: str) -> Dict[str, Any]:
+        """seed the answer and image caches from a snapshot file
+
+        answer lifetimes count from the first import of a snapshot, loading
+        the same file again on every boot does not extend them
+        """
+        marker = join(self.cache_dir, "snapshot.json")
+        try:
+            with open(marker) as f:
+                seen = json.load(f)
+        except (OSError, ValueError):
+            seen = {}
+        try:
+            created = read_manifest(path)["created"]
+            stats = import_snapshot(path, self.answer_cache, self.image_cache,
+                                    imported_at=seen.get("imported_at")
+                                    if seen.get("created") == created else None)
+        except (OSError, SnapshotError) as e:
+            self.log.error(f"failed to import DDG cache snapshot '{path}': {e}")
+            return {"error": str(e)}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(marker, "w") as f:
+                json.dump({"created": created, "imported_at": stats["imported_at"]}, f)
+        except OSError as e:
+            self.log.warning(f"failed to record DDG cache snapshot import: {e}")
+        return stats
+
+    def snapshot_path(self, path: str) -> Optional[str]:
+        """absolute path of a snapshot named in a bus message, None unless it is
+        in the cache dir or one of the `snapshot_dirs`
+
+        relative paths are relative to the cache dir
+        """
+        path = os.path.realpath(join(self.cache_dir, os.path.expanduser(path)))
+        for allowed in [self.cache_dir] + list(self.settings.get("snapshot_dirs") or []):
+            allowed = os.path.realpath(os.path.expanduser(allowed))
+            if os.path.commonpath([path, allowed]) == allowed:
+                return path
+        self.log.warning(f"DDG cache snapshot path not allowed: {path}")
+        return None
+
+    def handle_export_snapshot(self, message: Message):
+        """message.data: {"path": optional, defaults to snapshot.tar.gz in the cache dir}"""
+        path = self.snapshot_path(message.data.get("path") or "snapshot.tar.gz")
+        if path is None:
+            self.bus.emit(message.response({"error": "path not allowed"}))
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = dict(export_snapshot(path, self.answer_cache, self.image_cache), path=path)
+        except OSError as e:
+            self.log.error(f"failed to export DDG cache snapshot '{path}': {e}")
+            data = {"error": str(e)}
+        self.bus.emit(message.response(data))
+
+    def handle_import_snapshot(self, message: Message):
+        """message.data: {"path": snapshot file}"""
+        if not message.data.get("path"):
+            self.bus.emit(message.response({"error": "missing path"}))
+            return
+        path = self.snapshot_path(message.data["path"])
+        if path is None:
+            self.bus.emit(message.response({"error": "path not allowed"}))
+            return
+        self.bus.emit(message.response(self.import_cache_snapshot(path)))
+
+    # metrics
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"latency": self.metrics.snapshot(),
+                "sessions": self.session_results.stats(),
+                "cache": self.answer_cache.stats(),
+                "circuit": self.breaker.stats(),
+                "ratelimit": self.limiter.stats() if self.limiter else {},
+                "fanout": dict(self.fanout_wins),
+                "startup": dict(self.startup_times),
+                "images": self.image_cache.stats() if self.image_cache else {},
+                "prefilter": dict(self.is_blacklisted.cache_info()._asdict(),
+                                  **self.vocab_matcher.stats())}
+
+    def handle_metrics_request(self, message: Message):
+        self.bus.emit(message.response(self.get_metrics()))
+
+    def report_metrics(self):
+        """emit ovos.ddg.metrics and update the prometheus text file if configured"""
+        metrics = self.get_metrics()
+        self.bus.emit(Message("ovos.ddg.metrics", metrics,
+                              {"skill_id": self.skill_id}))
+        path = self.settings.get("metrics_file")
+        if path:
+            extra = {f"sessions_{k}": v for k, v in metrics["sessions"].items()}
+            extra.update({f"cache_{k}": v for k, v in metrics["cache"].items()})
+            extra.update({f"circuit_{k}": v for k, v in metrics["circuit"].items()})
+            extra.update({f"images_{k}": v for k, v in metrics["images"].items()})
+            extra.update({f"ratelimit_{k}": v for k, v in metrics["ratelimit"].items()})
+            extra.update({f"fanout_wins_{lang.lower().replace('-', '_')}": v
+                          for lang, v in metrics["fanout"].items()})
+            extra.update({f"startup_{k}_seconds": v for k, v in metrics["startup"].items()})
+            extra["circuit_open"] = int(metrics["circuit"]["state"] != CircuitBreaker.CLOSED)
+            try:
+                self.metrics.write_textfile(path, extra)
+            except OSError as e:
+                self.log.error(f"failed to write DDG metrics to {path}: {e}")
+
+    def normalize_query(self, query: str, lang: str) -> str:
+        """canonical form used for lookups, caching and the upstream request
+
+        "What's the speed of light?" and "speed of light" share one answer
+        """
+        if not self.settings.get("normalize_queries", True):
+            return query
+        return self._normalize(query, lang)
+
+    def infobox_intent(self, query: str, lang: str) -> Optional[str]:
+        """infobox field the solver would answer, None for a plain summary"""
+        intent = self.duck.match_infobox_intent(query, lang)[0]
+        return None if intent == "question" else intent
 
     @classproperty
     def runtime_requirements(self):
@@ -45,9 +409,8 @@ class DuckDuckGoSkill(OVOSSkill):
     @intent_handler("search_duck.intent",
                     voc_blacklist=["Weather", "Help"])
     def handle_search(self, message):
-        query = message.data["query"]
-
         sess = SessionManager.get(message)
+        query = self.normalize_query(message.data["query"], sess.lang)
         self.session_results[sess.session_id] = {
             "query": query,
             "results": [],
@@ -56,9 +419,17 @@ class DuckDuckGoSkill(OVOSSkill):
             "image": None,
         }
 
-        summary = self.ask_the_duck(sess)
+        streamed = []
+
+        def _speak_first(sentence: str):
+            with self.metrics.timer("speak", sess.lang):
+                self.speak(sentence)
+            streamed.append(sentence)
+
+        summary = self.ask_the_duck(
+            sess, on_first=_speak_first if self.settings.get("stream_answers", False) else None)
         if summary:
-            self.speak_result(sess)
+            self.speak_result(sess, spoken=bool(streamed))
         else:
             self.speak_dialog("no_answer")
 
@@ -73,64 +444,389 @@ class DuckDuckGoSkill(OVOSSkill):
         sess = SessionManager.get(message)
         self.speak_result(sess)
 
+    def handle_batch_query(self, message: Message):
+        """answer a list of queries in one reply
+
+        message.data: {"queries": [str], "lang": optional, "units": optional}
+        """
+        sess = SessionManager.get(message)
+        lang = message.data.get("lang") or sess.lang
+        units = message.data.get("units") or sess.system_unit
+        answers = self.batch_query(message.data.get("queries") or [], lang, units)
+        self.bus.emit(message.response({"answers": answers,
+                                        "lang": lang,
+                                        "units": units}))
+
+    def batch_query(self, queries: List[str], lang: str, units: str) -> List[Dict[str, Any]]:
+        """lookup all queries concurrently, rephrasings of a query are only looked up once
+
+        batches are not live questions, their requests go after interactive ones
+        """
+        def _lookup(query: str) -> List[Dict[str, Any]]:
+            with request_priority(BACKGROUND):
+                return self.lookup(query, lang, units)
+
+        normalized = {query: self.normalize_query(query, lang) for query in queries}
+        unique = {}
+        for query in normalized.values():
+            unique.setdefault(AnswerCache.make_key(query, lang, units), query)
+        with ThreadPoolExecutor(max_workers=self.settings.get("batch_workers", 4),
+                                thread_name_prefix="ddg-batch") as pool:
+            futures = {key: pool.submit(_lookup, query)
+                       for key, query in unique.items()}
+        answers = []
+        for query in queries:
+            try:
+                results = futures[AnswerCache.make_key(normalized[query], lang, units)].result()
+            except Exception as e:
+                self.log.error(f"DDG batch lookup failed for '{query}': {e}")
+                results = []
+            answers.append({"query": query,
+                            "answer": results[0]["summary"] if results else None,
+                            "results": results})
+        return answers
+
     def cq_callback(self, utterance: str, answer: str, lang: str):
         """ If selected show gui """
         sess = SessionManager.get()
+        self.prefetch_followups(sess)
         self.display_ddg(sess)
 
     @common_query(callback=cq_callback)
     def match_common_query(self, phrase: str, lang: str) -> Optional[Tuple[str, float]]:
-        if (self.voc_match(phrase, "MiscBlacklist") or
-                self.voc_match(phrase, "Weather")):
+        with self.metrics.timer("match", lang):
+            return self._match_common_query(phrase, lang)
+
+    def _is_blacklisted(self, phrase: str, lang: str) -> bool:
+        with self.metrics.timer("prefilter", lang):
+            return self.vocab_matcher.match(phrase, lang)
+
+    def _match_common_query(self, phrase: str, lang: str) -> Optional[Tuple[str, float]]:
+        if self.is_blacklisted(phrase, lang):
             return None
         sess = SessionManager.get()
         self.session_results[sess.session_id] = {
-            "query": phrase,
+            "query": self.normalize_query(phrase, lang),
             "results": [],
             "idx": 0,
             "lang": lang,
             "title": phrase,
             "image": None
         }
-        summary = self.ask_the_duck(sess)
+        summary = self.ask_the_duck(sess, lang=lang,
+                                    timeout=self.settings.get("cq_timeout", 0))
         if summary:
             self.log.info(f"DDG answer: {summary}")
             return summary, 0.6
 
     # duck duck go api
-    def ask_the_duck(self, sess: Session, lang: Optional[str] = None):
+    def fetch_answer(self, query: str, lang: str, units: str) -> List[Dict[str, Any]]:
+        """query DuckDuckGo and store the results in the answer cache
+
+        concurrent identical lookups share a single request
+        """
+        if self.engine:
+            return self.fetch_answer_async(query, lang, units).result()
+        return self.inflight.do(AnswerCache.make_key(query, lang, units),
+                                self._fetch_answer, query, lang, units)
+
+    def fetch_answer_async(self, query: str, lang: str, units: str) -> Future:
+        """non blocking fetch_answer, the request runs on the async engine
+
+        requires the "async_lookups" setting
+        """
+        return self.engine.submit_once(AnswerCache.make_key(query, lang, units),
+                                       self._async_fetch_answer, query, lang, units)
+
+    async def _async_fetch_answer(self, query: str, lang: str, units: str) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        try:
+            results = await self.engine.long_answer(query, lang, units)
+        except UpstreamError as e:
+            return self.serve_stale(query, lang, units, e)
+        self.metrics.observe("fetch", lang, time.perf_counter() - start)
+        self.answer_cache.put(query, lang, units, results)
+        return results
+
+    def _fetch_answer(self, query: str, lang: str, units: str) -> List[Dict[str, Any]]:
+        try:
+            with self.metrics.timer("fetch", lang):
+                results = self.duck.long_answer(query, lang=lang, units=units)
+        except UpstreamError as e:
+            return self.serve_stale(query, lang, units, e)
+        # misses are cached too, with a short ttl
+        self.answer_cache.put(query, lang, units, results)
+        return results
+
+    def stream_answer(self, query: str, lang: str, units: str,
+                      on_first: Callable[[str], None]) -> List[Dict[str, Any]]:
+        """like `fetch_answer`, `on_first` gets the first sentence as soon as it is parsed
+
+        the rest of the answer is collected and cached after the callback
+        returns. A caller joining an identical lookup in flight just waits
+        for the results
+        """
+        return self.inflight.do(AnswerCache.make_key(query, lang, units),
+                                self._stream_answer, query, lang, units, on_first)
+
+    def _stream_answer(self, query: str, lang: str, units: str,
+                       on_first: Callable[[str], None]) -> List[Dict[str, Any]]:
+        start = time.perf_counter()
+        results = []
+        try:
+            for step in self.duck.stream_answer(query, lang=lang, units=units):
+                results.append(step)
+                if len(results) == 1:
+                    self.metrics.observe("first_sentence", lang, time.perf_counter() - start)
+                    on_first(step["summary"])
+        except UpstreamError as e:
+            return self.serve_stale(query, lang, units, e)
+        self.metrics.observe("fetch", lang, time.perf_counter() - start)
+        self.answer_cache.put(query, lang, units, results)
+        return results
+
+    def serve_stale(self, query: str, lang: str, units: str,
+                    error: Exception) -> List[Dict[str, Any]]:
+        """DuckDuckGo is unreachable, answer from expired cache entries if possible
+
+        nothing is cached, the query is retried once DuckDuckGo is back
+        """
+        results = self.answer_cache.get_stale(query, lang, units)
+        self.log.info(f"DDG lookup failed ({error}), "
+                      f"{'serving stale answer' if results else 'no answer'}: {query}")
+        return results or []
+
+    def cached_answer(self, query: str, lang: str, units: str) -> Optional[List[Dict[str, Any]]]:
+        """cached results or None, stale answers are returned and refreshed in the background"""
+        results, stale = self.answer_cache.get_or_stale(query, lang, units,
+                                                        stale_for=self.revalidate_window)
+        if stale:
+            self.revalidate(query, lang, units)
+        return results
+
+    def revalidate(self, query: str, lang: str, units: str):
+        """refresh a cached answer in the worker pool, once per query at a time"""
+        if self._stopping.is_set():
+            return
+        key = AnswerCache.make_key(query, lang, units)
+        with self._revalidate_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def _refresh():
+            try:
+                with request_priority(BACKGROUND):
+                    self.fetch_answer(query, lang, units)
+            except Exception as e:
+                self.log.warning(f"DDG refresh failed for '{query}': {e}")
+            finally:
+                with self._revalidate_lock:
+                    self._revalidating.discard(key)
+
+        self.background.submit(_refresh)
+
+    def lookup(self, query: str, lang: str, units: str) -> List[Dict[str, Any]]:
+        """session independent answer lookup, from cache if possible"""
+        results = self.cached_answer(query, lang, units)
+        if results is None:
+            results = self.fetch_answer(query, lang, units)
+        return list(results or [])
+
+    def ask_the_duck(self, sess: Session, lang: Optional[str] = None,
+                     timeout: Optional[float] = None,
+                     on_first: Optional[Callable[[str], None]] = None):
+        """lookup the session query, from cache if possible
+
+        if a timeout is given the network request runs in the worker pool,
+        once the deadline passes no answer is returned but the request is
+        left running so its result is cached for whoever asks next
+
+        without a timeout a network lookup can be streamed, see `stream_answer`
+        """
         lang = lang or sess.lang
+        units = sess.system_unit
         query = self.session_results[sess.session_id]["query"]
-        results = self.duck.long_answer(query, lang=lang, units=sess.system_unit)
-        self.session_results[sess.session_id]["results"] = results
+        if self.query_history:
+            self.query_history.record(query, lang, units)
+        langs = self.fanout_langs(lang)
+        if len(langs) > 1:
+            results, lang = self.fanout_lookup(query, langs, units, timeout)
+            # follow ups (images, related topics) use the language that answered
+            self.session_results[sess.session_id]["lang"] = lang
+        else:
+            with self.metrics.timer("cache", lang):
+                results = self.cached_answer(query, lang, units)
+        if results is None and timeout:
+            if self.engine:
+                future = self.fetch_answer_async(query, lang, units)
+            else:
+                future = self.executor.submit(self.fetch_answer, query, lang, units)
+            try:
+                results = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                self.log.info(f"DDG lookup exceeded {timeout}s budget: {query}")
+                results = []
+        elif results is None and on_first:
+            results = self.stream_answer(query, lang, units, on_first)
+        elif results is None:
+            results = self.fetch_answer(query, lang, units)
+        # compact copy, coalesced lookups hand the same list to every session
+        self.session_results[sess.session_id]["results"] = compact_results(results)
         if results:
+            # long_answer already fetched the image, keep it for the GUI
+            self.session_results[sess.session_id]["image"] = results[0].get("img")
             self.set_context("DuckKnows", query)
             return results[0]["summary"]
 
+    def fanout_langs(self, lang: str) -> List[str]:
+        """languages a query is looked up in, the session language first
+
+        only the session language unless `multilang_fanout` is set, then also
+        `fanout_langs` or the secondary languages
+        """
+        langs = [lang]
+        if self.settings.get("multilang_fanout", False):
+            for extra in self.settings.get("fanout_langs") or self.secondary_langs:
+                if extra.lower() not in (l.lower() for l in langs):
+                    langs.append(extra)
+        return langs
+
+    def fanout_lookup(self, query: str, langs: List[str], units: str,
+                      timeout: Optional[float] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """look the query up in all `langs` at once, the first non empty answer wins
+
+        returns (results, lang that answered). Cached answers are used first,
+        in `langs` order, languages with a known miss are not asked again.
+        Lookups not started yet are cancelled once there is an answer, the
+        ones already in flight finish in the background and are cached.
+        A `timeout` of 0 or None waits for the answer, like `ask_the_duck`
+        """
+        timeout = timeout or None
+        with self.metrics.timer("cache", langs[0]):
+            cached = {lang: self.cached_answer(query, lang, units) for lang in langs}
+        for lang, results in cached.items():
+            if results:
+                self.fanout_wins[lang] += 1
+                return results, lang
+        futures = {}
+        for lang in langs:
+            if cached[lang] is None:
+                future = self.fetch_answer_async(query, lang, units) if self.engine else \
+                    self.executor.submit(self.fetch_answer, query, lang, units)
+                futures[future] = lang
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = set(futures)
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                self.log.info(f"DDG lookup exceeded {timeout}s budget: {query}")
+                break
+            for future in sorted(done, key=lambda f: langs.index(futures[f])):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    self.log.warning(f"DDG {futures[future]} lookup failed for '{query}': {e}")
+                    continue
+                if results:
+                    if not self.engine:
+                        # shared engine futures are left alone, others may wait on them
+                        for loser in pending:
+                            loser.cancel()
+                    self.fanout_wins[futures[future]] += 1
+                    return results, futures[future]
+        return [], langs[0]
+
+    def get_image(self, query: str, lang: str, units: str) -> str:
+        if self.engine:
+            return self.engine.run(self.engine.get_image(query, lang, units))
+        return self.duck.get_image(query, lang=lang, units=units)
+
     def display_ddg(self, sess: Session):
         if not can_use_gui(self.bus):
             return
+        with self.metrics.timer("gui", sess.lang):
+            self._display_ddg(sess)
+
+    def _display_ddg(self, sess: Session):
         if sess.session_id in self.session_results:
-            idx = self.session_results[sess.session_id]["idx"]
-            query = self.session_results[sess.session_id].get("query")
-            results = self.session_results[sess.session_id]["results"]
-            summary = results[idx]["summary"]
-            image = self.session_results[sess.session_id].get("image") or self.duck.get_image(query,
-                                                                                              lang=sess.lang,
-                                                                                              units=sess.system_unit)
+            entry = self.session_results[sess.session_id]
+            idx = entry["idx"]
+            results = entry["results"]
+            summary = results[idx].summary
+            image = results[idx].img or entry.get("image")
+            if not image:
+                # only hit the network once per session, reused on "tell me more"
+                try:
+                    with request_priority(BACKGROUND):
+                        image = entry["image"] = self.get_image(
+                            entry.get("query"), lang=entry.get("lang") or sess.lang,
+                            units=sess.system_unit)
+                except UpstreamError as e:
+                    self.log.debug(f"DDG image lookup failed: {e}")
             if sess.session_id == "default":
                 if not image:
                     self.gui.show_image("logo.png")
                 else:
-                    if image.startswith("/"):
+                    if image.startswith("/") and not os.path.isfile(image):
+                        # relative DuckDuckGo path, not the solver's local logo
                         image = "https://duckduckgo.com" + image
+                    if self.image_cache:
+                        # GUI sized local copy once downloaded, the remote url
+                        # until then so the page is not held up
+                        local = self.image_cache.cached(image, touch=True)
+                        if not local and not os.path.isfile(image):
+                            self.background.submit(self._cache_image, image)
+                        image = local or image
                     self.gui['summary'] = summary or ""
                     self.gui['imgLink'] = image
                     self.gui.show_page("DuckDelegate", override_idle=60)
 
-    def speak_result(self, sess: Session):
+    def _cache_image(self, url: str):
+        try:
+            with request_priority(BACKGROUND):
+                self.image_cache.get(url)
+        except Exception as e:
+            self.log.debug(f"DDG image cache failed for {url}: {e}")
+
+    def prefetch_followups(self, sess: Session):
+        """warm the "tell me more" results in the background
+
+        runs while the first answer is being spoken, related topics (with
+        their images) are appended to the session results so follow ups are
+        answered from memory
+        """
+        if not self.settings.get("prefetch_followups", False):
+            return
+        entry = self.session_results.get(sess.session_id)
+        if not entry or not entry["results"] or entry.get("prefetch"):
+            return
+        entry["prefetch"] = self.background.submit(self._prefetch_related, entry,
+                                                   sess.system_unit)
+
+    def _prefetch_related(self, entry: Dict[str, Any], units: str):
+        query = entry["query"]
+        try:
+            with request_priority(BACKGROUND):
+                data = self.duck.extract_and_search(query, lang=entry["lang"], units=units)
+        except Exception as e:
+            self.log.warning(f"DDG prefetch failed for '{query}': {e}")
+            return
+        known = {r.summary for r in entry["results"]}
+        for topic in data.get("RelatedTopics", []):
+            text = topic.get("Text")
+            if not text or text in known:
+                continue
+            img = (topic.get("Icon") or {}).get("URL") or None
+            if img and img.startswith("/"):
+                img = "https://duckduckgo.com" + img
+            entry["results"].append(Result(text, img))
+
+    def speak_result(self, sess: Session, spoken: bool = False):
+        """speak the next result, `spoken` if it was already spoken while streaming"""
 
-        if sess in self.session_results:
+        if sess.session_id in self.session_results:
             results = self.session_results[sess.session_id]["results"]
             idx = self.session_results[sess.session_id]["idx"]
             title = self.session_results[sess.session_id].get("title") or \
@@ -141,8 +837,11 @@ class DuckDuckGoSkill(OVOSSkill):
                 self.remove_context("DuckKnows")
                 self.session_results[sess.session_id]["idx"] = 0
             else:
-                self.speak(results[idx]["summary"])
+                if not spoken:
+                    with self.metrics.timer("speak", sess.lang):
+                        self.speak(results[idx].summary)
                 self.set_context("DuckKnows", "DuckDuckGo")
+                self.prefetch_followups(sess)
                 self.display_ddg(sess)
                 self.session_results[sess.session_id]["idx"] += 1
         else:
@@ -154,8 +853,18 @@ class DuckDuckGoSkill(OVOSSkill):
     def stop(self):
         session = SessionManager.get()
         # called during global stop only
-        if session.session_id in self.session_results:
-            self.session_results.pop(session.session_id)
+        self.session_results.pop(session.session_id)
         if session.session_id == "default":
             self.gui.release()
 
+    def shutdown(self):
+        self._stopping.set()
+        if self.query_history:
+            self.query_history.save()
+        if self.engine:
+            self.engine.shutdown()
+        self.executor.shutdown(wait=False)
+        self.background.shutdown(wait=False)
+        self.answer_cache.close()
+        self.http.close()
+        super().shutdown()
@@ -0,0 +1,212 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import socket
+import sqlite3
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Entry = Tuple[float, List[Dict[str, Any]]]
+
+
+class CacheBackend:
+    """Persistent or shared tier behind `AnswerCache`.
+
+    Entries are (expires, results) keyed by `AnswerCache.make_key`. Methods
+    may raise, the answer cache then falls back to its in-memory tier.
+    """
+    name = "none"
+
+    def get(self, key: str) -> Optional[Entry]:
+        raise NotImplementedError
+
+    def put(self, key: str, expires: float, results: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def put_many(self, entries: Iterable[Tuple[str, float, List[Dict[str, Any]]]]):
+        for key, expires, results in entries:
+            self.put(key, expires, results)
+
+    def items(self) -> Iterator[Tuple[str, float, List[Dict[str, Any]]]]:
+        """(key, expires, results) of every entry, empty if it can not be listed"""
+        return iter(())
+
+    def close(self):
+        pass
+
+
+class SqliteBackend(CacheBackend):
+    """sqlite file, safe to share between skill processes on the same host
+
+    WAL mode lets readers proceed while another process writes, writers
+    wait up to `timeout` seconds for the lock
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, timeout: float = 5):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._lock = Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS answers "
+                         "(key TEXT PRIMARY KEY, expires REAL, results TEXT)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            row = self._db.execute("SELECT expires, results FROM answers WHERE key=?",
+                                   (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, expires: float, results: List[Dict[str, Any]]):
+        data = json.dumps(results)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)",
+                             (key, expires, data))
+            self._db.commit()
+
+    def put_many(self, entries: Iterable[Tuple[str, float, List[Dict[str, Any]]]]):
+        rows = [(key, expires, json.dumps(results)) for key, expires, results in entries]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def items(self) -> Iterator[Tuple[str, float, List[Dict[str, Any]]]]:
+        with self._lock:
+            rows = self._db.execute("SELECT key, expires, results FROM answers").fetchall()
+        for key, expires, results in rows:
+            yield key, expires, json.loads(results)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM answers WHERE key=?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM answers")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class SocketBackend(CacheBackend):
+    """client of a `CacheServer` over a unix socket or tcp
+
+    one json object per line each way, see `cache_server.py`. Requests
+    time out after `timeout` seconds so a stuck server never stalls a
+    lookup for long, `token` is sent with every request if the server
+    requires one
+    """
+    name = "socket"
+
+    def __init__(self, address, timeout: float = 0.5, token: Optional[str] = None):
+        # a path for unix sockets, (host, port) for tcp
+        self.address = address
+        self.timeout = timeout
+        self.token = token
+        self._lock = Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self):
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def _disconnect(self):
+        for closeable in (self._file, self._sock):
+            try:
+                if closeable is not None:
+                    closeable.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def request(self, op: str, **data) -> Dict[str, Any]:
+        if self.token:
+            data["token"] = self.token
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._file.write(json.dumps(dict(data, op=op)).encode("utf-8") + b"\n")
+                self._file.flush()
+                line = self._file.readline()
+                if not line:
+                    raise ConnectionError("cache server closed the connection")
+            except (OSError, ValueError):
+                # reconnect on the next request
+                self._disconnect()
+                raise
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error") or "cache server error")
+        return reply
+
+    def get(self, key: str) -> Optional[Entry]:
+        entry = self.request("get", key=key).get("entry")
+        return tuple(entry) if entry else None
+
+    def put(self, key: str, expires: float, results: List[Dict[str, Any]]):
+        self.request("put", key=key, expires=expires, results=results)
+
+    def delete(self, key: str):
+        self.request("delete", key=key)
+
+    def clear(self):
+        self.request("clear")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request("stats")["stats"]
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def make_backend(spec: str, token: Optional[str] = None) -> CacheBackend:
+    """backend from a setting value
+
+    "sqlite:/path/answers.db", "unix:/run/ovos-ddg.sock" or "tcp:host:port",
+    `token` is the cache server shared secret
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "sqlite" and target:
+        return SqliteBackend(os.path.expanduser(target))
+    if kind == "unix" and target:
+        return SocketBackend(target, token=token)
+    if kind == "tcp" and target:
+        host, _, port = target.rpartition(":")
+        return SocketBackend((host or "127.0.0.1", int(port)), token=token)
+    raise ValueError(f"unknown DDG cache backend '{spec}'")
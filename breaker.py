@@ -0,0 +1,123 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+
+class UpstreamError(Exception):
+    """DuckDuckGo could not be reached, the answer is unknown rather than empty"""
+
+
+class CircuitOpenError(UpstreamError):
+    """request rejected without being sent, the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fail fast while DuckDuckGo is unreachable.
+
+    After `failure_threshold` consecutive failed requests the circuit opens
+    and requests are rejected without waiting for the http timeout. Once
+    `reset_timeout` seconds have passed a single probe request is let
+    through (half open), its outcome closes the circuit or opens it again.
+
+    `on_state_change(new_state, old_state)` is called outside the lock on
+    every transition.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30,
+                 on_state_change: Optional[Callable[[str, str], None]] = None):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self._lock = Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.trips = 0
+
+    def _set_state(self, state: str) -> Optional[str]:
+        """must hold the lock, returns the previous state if it changed"""
+        if state == self.state:
+            return None
+        old, self.state = self.state, state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+            self.trips += 1
+        return old
+
+    def _notify(self, old: Optional[str]):
+        if old is not None and self.on_state_change:
+            self.on_state_change(self.state, old)
+
+    def allow(self) -> bool:
+        """check before sending a request, False means fail fast"""
+        with self._lock:
+            old = None
+            if self.state == self.OPEN and \
+                    time.monotonic() - self.opened_at >= self.reset_timeout:
+                old = self._set_state(self.HALF_OPEN)
+            if self.state == self.CLOSED:
+                allowed = True
+            elif self.state == self.HALF_OPEN and not self._probing:
+                # only one probe at a time
+                self._probing = allowed = True
+            else:
+                allowed = False
+                self.rejected += 1
+        self._notify(old)
+        return allowed
+
+    def is_open(self) -> bool:
+        """True if `allow` would fail fast, without taking the half open probe
+
+        lets callers reject before waiting on anything else, eg. the rate
+        limiter, such rejections are counted too
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                rejected = time.monotonic() - self.opened_at < self.reset_timeout
+            else:
+                rejected = self.state == self.HALF_OPEN and self._probing
+            if rejected:
+                self.rejected += 1
+        return rejected
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            old = self._set_state(self.CLOSED)
+        self._notify(old)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            old = None
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._probing = False
+                old = self._set_state(self.OPEN)
+                # a failed probe restarts the wait
+                self.opened_at = time.monotonic()
+        self._notify(old)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state,
+                "failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected}
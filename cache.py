@@ -0,0 +1,339 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ovos_utils.log import LOG
+
+from .backends import CacheBackend, SqliteBackend
+
+
+class AnswerCache:
+    """Cache for `DuckDuckGoSolver.long_answer` results.
+
+    Keyed on (normalized query, lang, units), every entry expires `ttl`
+    seconds after being stored. A bounded in-memory LRU tier is always
+    used, results are also stored in `backend` (or a sqlite file at
+    `path`) so they survive restarts and can be shared with other skill
+    processes. If the backend fails the cache keeps working from memory,
+    the backend is retried after `backend_retry` seconds.
+
+    Empty results are cached too, for the shorter `negative_ttl`, so known
+    misses do not go upstream on every attempt.
+
+    Expired entries are kept for another `max_stale` seconds, `get` ignores
+    them but `get_stale` still returns them while DuckDuckGo is unreachable
+    and `get_or_stale` while a fresh answer is being fetched.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400,
+                 path: Optional[str] = None, negative_ttl: float = 300,
+                 max_stale: float = 0, backend: Optional[CacheBackend] = None,
+                 backend_retry: float = 30):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.path = path
+        self.backend_retry = backend_retry
+        self._lock = RLock()
+        # key -> (expires, results)
+        self._mem: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.backend = backend
+        self._backend_down_until = 0.0
+        self.backend_errors = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        if backend is None and path:
+            try:
+                self.backend = SqliteBackend(path)
+            except Exception as e:
+                LOG.error(f"failed to open DDG answer cache '{path}': {e}")
+
+    def _backend_call(self, method: str, *args) -> Any:
+        """call the backend, None while it is failing"""
+        if self.backend is None or time.monotonic() < self._backend_down_until:
+            return None
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            self.backend_errors += 1
+            self._backend_down_until = time.monotonic() + self.backend_retry
+            LOG.warning(f"DDG {self.backend.name} cache unavailable, "
+                        f"using memory only for {self.backend_retry}s: {e}")
+            return None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.casefold().split())
+
+    @classmethod
+    def make_key(cls, query: str, lang: Optional[str] = None,
+                 units: Optional[str] = None) -> str:
+        return "|".join((cls.normalize(query),
+                         (lang or "").lower(),
+                         (units or "").lower()))
+
+    def _mem_put(self, key: str, expires: float,
+                 results: List[Dict[str, Any]]):
+        self._mem[key] = (expires, results)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def get(self, query: str, lang: Optional[str] = None,
+            units: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """return cached results, or None on a miss
+
+        an empty list means the query is a known miss
+        """
+        key = self.make_key(query, lang, units)
+        now = time.time()
+        entry = self._lookup(key, now)
+        if entry is not None and entry[0] < now:
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._touch(key)
+            self.hits += 1
+            if not entry[1]:
+                self.negative_hits += 1
+            return list(entry[1])
+
+    def get_or_stale(self, query: str, lang: Optional[str] = None,
+                     units: Optional[str] = None,
+                     stale_for: float = 0) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """like `get`, but answers expired less than `stale_for` seconds ago are
+        returned too, flagged as stale so the caller can refresh them
+
+        returns (results, stale), known misses are never served stale
+        """
+        key = self.make_key(query, lang, units)
+        now = time.time()
+        entry = self._lookup(key, now)
+        stale = entry is not None and entry[0] < now
+        if stale and (not entry[1] or entry[0] + stale_for < now):
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._touch(key)
+            self.hits += 1
+            if stale:
+                self.stale_hits += 1
+            elif not entry[1]:
+                self.negative_hits += 1
+            return list(entry[1]), stale
+
+    def get_stale(self, query: str, lang: Optional[str] = None,
+                  units: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """return results even if expired less than `max_stale` seconds ago
+
+        known misses are not returned, None if nothing usable is cached
+        """
+        key = self.make_key(query, lang, units)
+        entry = self._lookup(key, time.time())
+        if entry is None or not entry[1]:
+            return None
+        with self._lock:
+            self.stale_hits += 1
+        return list(entry[1])
+
+    def _touch(self, key: str):
+        """must hold the lock, the entry may have been evicted meanwhile"""
+        if key in self._mem:
+            self._mem.move_to_end(key)
+
+    def _lookup(self, key: str, now: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """memory first, then the backend, drops entries past their stale window
+
+        the backend is called without holding the lock, a slow or remote
+        backend never blocks lookups answered from memory
+        """
+        with self._lock:
+            entry = self._mem.get(key)
+        if entry is None:
+            entry = self._backend_call("get", key)
+            if entry is not None:
+                with self._lock:
+                    # a put while the backend was asked wins
+                    if key in self._mem:
+                        entry = self._mem[key]
+                    else:
+                        self._mem_put(key, *entry)
+        if entry is not None and entry[0] + self.max_stale < now:
+            self._delete(key, entry)
+            entry = None
+        return entry
+
+    def has(self, query: str, lang: Optional[str] = None,
+            units: Optional[str] = None) -> bool:
+        """check for a valid entry without touching LRU order or counters"""
+        key = self.make_key(query, lang, units)
+        with self._lock:
+            entry = self._mem.get(key)
+        if entry is None:
+            entry = self._backend_call("get", key)
+        return entry is not None and entry[0] >= time.time()
+
+    def put(self, query: str, lang: Optional[str], units: Optional[str],
+            results: List[Dict[str, Any]], ttl: Optional[float] = None):
+        key = self.make_key(query, lang, units)
+        results = list(results or [])
+        if ttl is None:
+            ttl = self.ttl if results else self.negative_ttl
+        expires = time.time() + ttl
+        with self._lock:
+            self._mem_put(key, expires, results)
+        self._backend_call("put", key, expires, results)
+
+    def entries(self) -> List[Tuple[str, float, List[Dict[str, Any]]]]:
+        """(key, expires, results) of every cached answer, known misses excluded"""
+        with self._lock:
+            entries = dict(self._mem)
+        for key, expires, results in self._backend_call("items") or ():
+            if expires > entries.get(key, (0,))[0]:
+                entries[key] = (expires, results)
+        return [(key, expires, results) for key, (expires, results) in entries.items()
+                if results]
+
+    def load(self, entries: Iterable[Tuple[str, float, List[Dict[str, Any]]]]) -> int:
+        """add entries unless a newer answer is cached, returns how many were added"""
+        added = []
+        for key, expires, results in entries:
+            with self._lock:
+                current = self._mem.get(key)
+            if current is None:
+                current = self._backend_call("get", key)
+            if current is not None and current[0] >= expires:
+                continue
+            with self._lock:
+                current = self._mem.get(key)
+                if current is not None and current[0] >= expires:
+                    continue
+                self._mem_put(key, expires, results)
+            added.append((key, expires, results))
+        if added:
+            self._backend_call("put_many", added)
+        return len(added)
+
+    def _delete(self, key: str, entry: Tuple[float, List[Dict[str, Any]]]):
+        """drop `entry`, unless it was replaced meanwhile"""
+        with self._lock:
+            current = self._mem.get(key)
+            if current is not None and current[0] != entry[0]:
+                return
+            self._mem.pop(key, None)
+        self._backend_call("delete", key)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        self._backend_call("clear")
+
+    def close(self):
+        with self._lock:
+            if self.backend is not None:
+                try:
+                    self.backend.close()
+                except Exception as e:
+                    LOG.debug(f"failed to close DDG cache backend: {e}")
+                self.backend = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"size": len(self._mem),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "persistent": self.backend is not None,
+                "backend": self.backend.name if self.backend else None,
+                "backend_errors": self.backend_errors}
+
+
+class QueryHistory:
+    """Frequency count of asked queries, persisted as a small json file.
+
+    Only the `max_entries` most frequent queries are kept on disk, used to
+    warm up the answer cache after a restart.
+    """
+
+    def __init__(self, path: str, max_entries: int = 500, flush_every: int = 50):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self._lock = RLock()
+        # key -> [query, lang, units, count]
+        self._counts: Dict[str, list] = {}
+        self._unsaved = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            LOG.warning(f"failed to load DDG query history '{self.path}': {e}")
+            return
+        with self._lock:
+            for query, lang, units, count in entries:
+                self._counts[AnswerCache.make_key(query, lang, units)] = [query, lang, units, count]
+
+    def save(self):
+        with self._lock:
+            entries = sorted(self._counts.values(), key=lambda e: e[3],
+                             reverse=True)[:self.max_entries]
+            self._counts = {AnswerCache.make_key(*e[:3]): e for e in entries}
+            self._unsaved = 0
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            LOG.warning(f"failed to save DDG query history '{self.path}': {e}")
+
+    def record(self, query: str, lang: Optional[str], units: Optional[str]):
+        key = AnswerCache.make_key(query, lang, units)
+        with self._lock:
+            if key in self._counts:
+                self._counts[key][3] += 1
+            else:
+                self._counts[key] = [query, lang, units, 1]
+            self._unsaved += 1
+            flush = self._unsaved >= self.flush_every
+        if flush:
+            self.save()
+
+    def top(self, n: int, langs: Optional[List[str]] = None) -> List[Tuple[str, str, str]]:
+        """most frequent (query, lang, units), optionally only for `langs`"""
+        langs = {l.lower() for l in langs} if langs else None
+        with self._lock:
+            entries = sorted(self._counts.values(), key=lambda e: e[3], reverse=True)
+        return [(query, lang, units) for query, lang, units, _ in entries
+                if langs is None or (lang or "").lower() in langs][:n]
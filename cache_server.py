@@ -0,0 +1,208 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Answer cache shared by DuckDuckGo skill instances.
+
+    python -m ovos_skill_ddg.cache_server --unix /run/ovos-ddg.sock
+    OVOS_DDG_CACHE_TOKEN=secret python -m ovos_skill_ddg.cache_server --tcp 0.0.0.0:7733
+
+then point every skill to it with the `cache_backend` setting, eg.
+"unix:/run/ovos-ddg.sock" or "tcp:cache-host:7733", and the same
+`cache_token`.
+
+whoever can reach the server can store answers the skills will speak,
+tcp listens on localhost unless a host is given, only listen on other
+interfaces with a token
+"""
+import argparse
+import hmac
+import json
+import os
+import socket
+import socketserver
+import time
+from collections import OrderedDict
+from threading import Lock, Thread
+from typing import Any, Dict, Optional
+
+from ovos_utils.log import LOG
+
+
+class CacheStore:
+    """bounded LRU of key -> (expires, results), entries are dropped
+    `max_stale` seconds after they expire"""
+
+    def __init__(self, max_entries: int = 10000, max_stale: float = 86400):
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        with self._lock:
+            if op == "get":
+                entry = self._entries.get(request["key"])
+                if entry is not None and entry[0] + self.max_stale < time.time():
+                    del self._entries[request["key"]]
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._entries.move_to_end(request["key"])
+                return {"ok": True, "entry": entry}
+            if op == "put":
+                self._entries[request["key"]] = (request["expires"], request["results"])
+                self._entries.move_to_end(request["key"])
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return {"ok": True}
+            if op == "delete":
+                self._entries.pop(request["key"], None)
+                return {"ok": True}
+            if op == "clear":
+                self._entries.clear()
+                return {"ok": True}
+            if op == "stats":
+                return {"ok": True, "stats": {"size": len(self._entries),
+                                              "max_entries": self.max_entries,
+                                              "hits": self.hits,
+                                              "misses": self.misses}}
+        return {"ok": False, "error": f"unknown op '{op}'"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        with self.server.clients_lock:
+            self.server.clients.add(self.request)
+
+    def finish(self):
+        with self.server.clients_lock:
+            self.server.clients.discard(self.request)
+        try:
+            super().finish()
+        except OSError:
+            pass  # dropped by stop()
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if self.server.token and not hmac.compare_digest(
+                        str(request.get("token", "")).encode("utf-8"),
+                        self.server.token.encode("utf-8")):
+                    reply = {"ok": False, "error": "invalid token"}
+                else:
+                    reply = self.server.store.handle(request)
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"ok": False, "error": repr(e)}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class CacheServer:
+    """serve a `CacheStore` on a unix socket path or a (host, port) tuple
+
+    if `token` is set requests without it are refused
+    """
+
+    def __init__(self, address, store: Optional[CacheStore] = None,
+                 token: Optional[str] = None):
+        self.store = store or CacheStore()
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)  # stale socket from a previous run
+            self.server = _UnixServer(address, _Handler)
+        else:
+            self.server = _TCPServer(address, _Handler)
+        self.server.store = self.store
+        self.server.token = token
+        self.server.clients = set()
+        self.server.clients_lock = Lock()
+        self.address = self.server.server_address
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> "CacheServer":
+        self._thread = Thread(target=self.server.serve_forever,
+                              name="ddg-cache-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        # drop connected clients too, they fall back to their memory cache
+        with self.server.clients_lock:
+            for client in self.server.clients:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--unix", help="unix socket path")
+    where.add_argument("--tcp", help="host:port to listen on, localhost if no host is given")
+    parser.add_argument("--token", default=os.environ.get("OVOS_DDG_CACHE_TOKEN"),
+                        help="shared secret clients must send, "
+                             "defaults to $OVOS_DDG_CACHE_TOKEN")
+    parser.add_argument("--max-entries", type=int, default=10000)
+    parser.add_argument("--max-stale", type=float, default=86400,
+                        help="seconds expired answers are kept for stale serving")
+    args = parser.parse_args(argv)
+    if args.unix:
+        address = args.unix
+    else:
+        host, _, port = args.tcp.rpartition(":")
+        address = (host or "127.0.0.1", int(port))
+        if not args.token and address[0] not in ("127.0.0.1", "localhost", "::1"):
+            LOG.warning(f"DDG cache server on {address[0]} without a token, anyone "
+                        f"who can reach it can change the answers the skills speak")
+    server = CacheServer(address, CacheStore(args.max_entries, args.max_stale),
+                         token=args.token)
+    LOG.info(f"DDG cache server listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+from os.path import join, splitext
+from threading import RLock
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from ovos_utils.log import LOG
+
+from .lookup import SingleFlight
+from .ratelimit import BACKGROUND, RateLimiter
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class ImageCache:
+    """Download DuckDuckGo images once and keep GUI sized copies on disk.
+
+    Images are shrunk to fit `max_size` and recompressed as jpeg when Pillow
+    is installed, otherwise the original file is stored. The directory is
+    kept under `max_bytes`, least recently used files are deleted first.
+    Downloads go through `limiter` as background requests when given,
+    failed downloads are not retried for `failure_ttl` seconds.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024,
+                 max_size: Tuple[int, int] = (800, 480), quality: int = 80,
+                 session: Optional[requests.Session] = None,
+                 timeout: Tuple[float, float] = (3.05, 10),
+                 limiter: Optional[RateLimiter] = None,
+                 failure_ttl: float = 300):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_size = tuple(max_size)
+        self.quality = quality
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.limiter = limiter
+        self.failure_ttl = failure_ttl
+        self._lock = RLock()
+        # url -> time.monotonic() the download may be tried again
+        self._failed: "OrderedDict[str, float]" = OrderedDict()
+        self._downloads = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+        self.total_bytes = sum(os.path.getsize(join(path, f)) for f in os.listdir(path)
+                               if not f.endswith(".tmp"))
+
+    def _filename(self, url: str) -> str:
+        ext = ".jpg" if Image is not None else \
+            (splitext(urlparse(url).path)[1].lower() or ".img")
+        return join(self.path, hashlib.sha1(url.encode("utf-8")).hexdigest() + ext)
+
+    def get(self, url: str) -> Optional[str]:
+        """local path of the GUI sized image, None if it could not be downloaded
+
+        only http(s) urls are downloaded
+        """
+        if urlparse(url).scheme not in ("http", "https"):
+            return None
+        filename = self._filename(url)
+        if os.path.isfile(filename):
+            try:
+                # mtime doubles as the LRU clock
+                os.utime(filename)
+                self.hits += 1
+                return filename
+            except OSError:
+                pass  # evicted meanwhile
+        with self._lock:
+            retry_at = self._failed.get(url)
+            if retry_at is not None:
+                if retry_at > time.monotonic():
+                    return None
+                del self._failed[url]
+        return self._downloads.do(url, self._download, url, filename)
+
+    def cached(self, url: str, touch: bool = False) -> Optional[str]:
+        """local path if the image is cached, never downloads
+
+        `touch` counts it as shown for the LRU order
+        """
+        filename = self._filename(url)
+        if not os.path.isfile(filename):
+            return None
+        if touch:
+            try:
+                os.utime(filename)
+                self.hits += 1
+            except OSError:
+                return None  # evicted meanwhile
+        return filename
+
+    def put(self, url: str, data: bytes) -> Optional[str]:
+        """store an already GUI sized image, eg. from a cache snapshot"""
+        return self.cached(url) or self._store(self._filename(url), data)
+
+    def _download(self, url: str, filename: str) -> Optional[str]:
+        self.misses += 1
+        try:
+            if self.limiter:
+                self.limiter.acquire(BACKGROUND)
+            resp = self.session.get(url, timeout=self.timeout)
+            resp.raise_for_status()
+            data = self.resize(resp.content)
+        except Exception as e:
+            LOG.debug(f"failed to cache DDG image {url}: {e}")
+            self._failure(url)
+            return None
+        return self._store(filename, data)
+
+    def _failure(self, url: str):
+        with self._lock:
+            self.failures += 1
+            self._failed[url] = time.monotonic() + self.failure_ttl
+            self._failed.move_to_end(url)
+            while len(self._failed) > 1024:
+                self._failed.popitem(last=False)
+
+    def _store(self, filename: str, data: bytes) -> Optional[str]:
+        tmp = f"{filename}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, filename)
+        except OSError as e:
+            LOG.warning(f"failed to store DDG image {filename}: {e}")
+            return None
+        with self._lock:
+            self.total_bytes += len(data)
+            self._evict(keep=filename)
+        return filename
+
+    def resize(self, data: bytes) -> bytes:
+        """shrink to `max_size` and recompress, unchanged without Pillow"""
+        if Image is None:
+            return data
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail(self.max_size)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=self.quality, optimize=True)
+        return out.getvalue()
+
+    def _evict(self, keep: str):
+        """must hold the lock, delete least recently used files over max_bytes"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        files = []
+        for name in os.listdir(self.path):
+            filename = join(self.path, name)
+            if filename == keep or name.endswith(".tmp"):
+                continue
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, filename))
+        for _, size, filename in sorted(files):
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "failures": self.failures,
+                "evictions": self.evictions,
+                "resize": Image is not None}
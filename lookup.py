@@ -0,0 +1,237 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import contextvars
+from concurrent.futures import Executor, Future
+from threading import Lock, RLock, Thread
+from typing import Any, Callable, Coroutine, Dict, Hashable, List, Optional
+
+from ovos_utils.log import LOG
+
+from .breaker import CircuitOpenError
+from .ratelimit import current_priority, request_priority
+
+# preloaded in a solver request scope, the request already failed
+REQUEST_FAILED = object()
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls sharing the same key.
+
+    The first caller for a key runs the function, callers arriving while it
+    is still in flight wait for it and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncLookupEngine:
+    """Run DuckDuckGo requests concurrently on a single event loop.
+
+    The loop lives in a daemon thread, so many lookups can be in flight
+    without holding one thread each while waiting on the network. API
+    requests use aiohttp when installed, otherwise the blocking solver
+    request runs in `executor`. The solver post-processing (infobox
+    parsing, sentence splitting) always runs in `executor`, with the API
+    response preloaded in the solver request scope.
+
+    Coroutines can be awaited from the loop, sync callers use `submit`
+    (returns a `concurrent.futures.Future`) or `run`, the request priority
+    of the calling thread carries over to the coroutine.
+
+    pass `solver_factory` instead of `solver` to only build the solver on
+    the first lookup
+    """
+
+    def __init__(self, solver=None, max_in_flight: int = 32,
+                 executor: Optional[Executor] = None,
+                 solver_factory: Optional[Callable[[], Any]] = None):
+        self._solver = solver
+        self._solver_factory = solver_factory
+        try:
+            # heavy, only imported when async lookups are enabled
+            import aiohttp
+        except ImportError:
+            aiohttp = None
+        self._aiohttp = aiohttp
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self.loop = asyncio.new_event_loop()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._http = None
+        # reentrant, done callbacks run inline if the future already finished
+        self._lock = RLock()
+        self._pending: Dict[Hashable, Future] = {}
+        self._thread = Thread(target=self.loop.run_forever,
+                              name="ddg-async", daemon=True)
+        self._thread.start()
+
+    @property
+    def solver(self):
+        if self._solver is None:
+            self._solver = self._solver_factory()
+        return self._solver
+
+    # sync wrappers
+    def submit(self, coro: Coroutine) -> Future:
+        priority = current_priority()
+
+        async def _with_priority():
+            with request_priority(priority):
+                return await coro
+
+        return asyncio.run_coroutine_threadsafe(_with_priority(), self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        return self.submit(coro).result(timeout)
+
+    def submit_once(self, key: Hashable, coro_func: Callable[..., Coroutine],
+                    *args, **kwargs) -> Future:
+        """like `submit`, concurrent calls with the same key share one future"""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self.submit(coro_func(*args, **kwargs))
+                future.add_done_callback(lambda f: self._forget(key, f))
+            return future
+
+    def in_flight(self) -> int:
+        """`submit_once` lookups not finished yet"""
+        with self._lock:
+            return len(self._pending)
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                self._pending.pop(key)
+
+    # coroutines, run on self.loop
+    async def get_data(self, query: str, lang: Optional[str] = None,
+                       units: Optional[str] = None) -> Dict[str, Any]:
+        params = self.solver.api_params(query, lang)
+        if params is None:
+            return {}
+        data = await self._request(query, lang, units, params)
+        return {} if data is REQUEST_FAILED else data
+
+    async def _request(self, query: str, lang: Optional[str], units: Optional[str],
+                       params: Dict[str, str]) -> Any:
+        """API response, `REQUEST_FAILED` if the aiohttp request failed"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            aiohttp = self._aiohttp
+            if aiohttp is None:
+                ctx = contextvars.copy_context()
+                return await self.loop.run_in_executor(self.executor, ctx.run,
+                                                       self.solver.get_data,
+                                                       query, lang, units)
+            if self._http is None:
+                connect, read = self.solver.timeout
+                self._http = aiohttp.ClientSession(
+                    timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read))
+            breaker = self.solver.breaker
+            # fail fast while open instead of queueing for a token first
+            if breaker and breaker.is_open():
+                raise CircuitOpenError("DuckDuckGo circuit is open")
+            limiter = self.solver.limiter
+            if limiter:
+                await self.loop.run_in_executor(self.executor, limiter.acquire,
+                                                current_priority())
+            if breaker and not breaker.allow():
+                raise CircuitOpenError("DuckDuckGo circuit is open")
+            try:
+                async with self._http.get(self.solver.api_url, params=params) as resp:
+                    data = await resp.json(content_type=None)
+            except Exception as e:
+                LOG.debug(f"DDG request failed: {e}")
+                if breaker:
+                    breaker.record_failure()
+                return REQUEST_FAILED
+            if breaker:
+                breaker.record_success()
+            return data
+
+    async def run_solver(self, func: Callable, query: str, lang: Optional[str] = None,
+                         units: Optional[str] = None) -> Any:
+        """fetch the API response on the loop, then call the solver method with it preloaded
+
+        a failed request is preloaded too, the solver handles it like its own
+        failed request instead of asking again. Without aiohttp the solver
+        makes the blocking request itself
+        """
+        params = self.solver.api_params(query, lang)
+        preloaded = {}
+        if params is not None and self._aiohttp is not None:
+            data = await self._request(query, lang, units, params)
+            preloaded[(params["q"], params["kl"])] = data
+
+        def _run():
+            with self.solver.request_scope(preloaded):
+                return func(query, lang=lang, units=units)
+
+        return await self.loop.run_in_executor(self.executor,
+                                               contextvars.copy_context().run, _run)
+
+    async def long_answer(self, query: str, lang: Optional[str] = None,
+                          units: Optional[str] = None) -> List[Dict[str, str]]:
+        return await self.run_solver(self.solver.long_answer, query, lang, units)
+
+    async def get_image(self, query: str, lang: Optional[str] = None,
+                        units: Optional[str] = None) -> str:
+        return await self.run_solver(self.solver.get_image, query, lang, units)
+
+    def shutdown(self):
+        if not self._thread.is_alive():
+            return
+
+        async def _close():
+            if self._http is not None:
+                await self._http.close()
+
+        try:
+            self.run(_close(), timeout=5)
+        except Exception as e:
+            LOG.debug(f"failed to close DDG http session: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
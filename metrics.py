@@ -0,0 +1,110 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyRecorder:
+    """count/sum of all observations plus a sliding window for percentiles"""
+
+    def __init__(self, window: int = 1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        data = {"count": self.count, "sum": self.total}
+        for q in QUANTILES:
+            data[f"p{int(q * 100)}"] = _quantile(ordered, q)
+        return data
+
+
+class SkillMetrics:
+    """latency of the skill hot path stages, per language
+
+    stages are free-form names, the skill uses "match", "prefilter", "cache",
+    "fetch", "first_sentence", "gui" and "speak"
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = Lock()
+        self._recorders: Dict[Tuple[str, str], LatencyRecorder] = {}
+
+    def observe(self, stage: str, lang: Optional[str], seconds: float):
+        key = (stage, (lang or "unknown").lower())
+        with self._lock:
+            if key not in self._recorders:
+                self._recorders[key] = LatencyRecorder(self.window)
+            self._recorders[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, lang: Optional[str] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, lang, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{stage: {lang: {count, sum, p50, p95, p99}}}"""
+        data = {}
+        with self._lock:
+            for (stage, lang), recorder in self._recorders.items():
+                data.setdefault(stage, {})[lang] = recorder.summary()
+        return data
+
+    def to_prometheus(self, extra: Optional[Dict[str, Any]] = None) -> str:
+        """render a prometheus text exposition, `extra` numbers become gauges"""
+        lines = ["# HELP ddg_stage_latency_seconds DuckDuckGo skill stage latency",
+                 "# TYPE ddg_stage_latency_seconds summary"]
+        for stage, langs in sorted(self.snapshot().items()):
+            for lang, summary in sorted(langs.items()):
+                labels = f'stage="{stage}",lang="{lang}"'
+                for q in QUANTILES:
+                    lines.append(f'ddg_stage_latency_seconds{{{labels},quantile="{q}"}} '
+                                 f'{summary[f"p{int(q * 100)}"]:.6f}')
+                lines.append(f"ddg_stage_latency_seconds_sum{{{labels}}} {summary['sum']:.6f}")
+                lines.append(f"ddg_stage_latency_seconds_count{{{labels}}} {summary['count']}")
+        for name, value in sorted((extra or {}).items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f"# TYPE ddg_{name} gauge")
+            lines.append(f"ddg_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str, extra: Optional[Dict[str, Any]] = None):
+        """atomically write the prometheus text file, eg. for node_exporter"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus(extra))
+        os.replace(tmp, path)
@@ -0,0 +1,163 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+from threading import Lock
+from typing import Callable, Dict, Optional, Pattern, Tuple
+
+# per language rules, keyed by primary language subtag
+#   contractions: expanded before anything else
+#   fillers: words only stripped when a lead prefix follows them, on their
+#            own they can be part of the query ("hey jude", "ok computer")
+#   lead: question prefixes that do not change the answer, stripped
+#         (repeatedly) from the start of the query
+#   pronouns: the prefix is kept if only one of these would remain
+#             ("who are you" is not "you")
+#   trail: filler words stripped from the end
+#   articles: dropped from the start if at least two words remain
+#             ("the who", "who is the who" keep theirs)
+# question words that do change the answer ("when was", "how many", ...)
+# are kept on purpose, DuckDuckGo infobox lookups depend on them
+RULES: Dict[str, Dict[str, tuple]] = {
+    "en": {
+        "contractions": (("what's", "what is"), ("who's", "who is"), ("what're", "what are"),
+                         ("who're", "who are"), ("where's", "where is"), ("when's", "when is"),
+                         ("how's", "how is"), ("that's", "that is"), ("it's", "it is"),
+                         ("i'm", "i am"), ("i'd", "i would"), ("isn't", "is not"),
+                         ("aren't", "are not"), ("wasn't", "was not"), ("don't", "do not"),
+                         ("doesn't", "does not"), ("didn't", "did not"), ("can't", "cannot")),
+        "fillers": ("please", "um", "uh", "erm", "hmm", "hey", "ok", "okay", "so"),
+        "lead": ("what is", "what are", "who is", "who are", "who was", "who were",
+                 "tell me about", "tell me", "do you know", "can you tell me",
+                 "could you tell me", "i want to know", "i would like to know"),
+        "pronouns": ("you", "i", "me", "it", "he", "she", "him", "her", "we", "us",
+                     "they", "them", "this", "that", "these", "those"),
+        "trail": ("please",),
+        "articles": ("the", "a", "an"),
+    },
+    "pt": {
+        "contractions": (),
+        "fillers": ("por favor", "hum", "olha", "então"),
+        "lead": ("o que é", "o que são", "quem é",
+                 "quem são", "quem foi", "fala me sobre", "fala-me sobre", "diz me",
+                 "diz-me", "sabes", "podes dizer me", "podes dizer-me", "me diga"),
+        "pronouns": ("tu", "você", "eu", "ele", "ela", "nós", "vós", "eles", "elas",
+                     "isto", "isso", "aquilo"),
+        "trail": ("por favor",),
+        "articles": ("o", "a", "os", "as", "um", "uma"),
+    },
+    "es": {
+        "contractions": (),
+        "fillers": ("por favor", "eh", "oye", "bueno"),
+        "lead": ("qué es", "que es", "qué son",
+                 "que son", "quién es", "quien es", "quién fue", "quien fue",
+                 "háblame de", "dime", "sabes"),
+        "pronouns": ("tú", "tu", "usted", "yo", "él", "ella", "nosotros", "vosotros",
+                     "ellos", "ellas", "esto", "eso"),
+        "trail": ("por favor",),
+        "articles": ("el", "la", "los", "las", "un", "una"),
+    },
+    "fr": {
+        "contractions": (("qu'est-ce que", "qu est ce que"), ("c'est", "c est")),
+        "fillers": ("s'il te plaît", "s'il vous plaît", "euh", "alors"),
+        "lead": ("qu est ce que",
+                 "c est quoi", "qu est ce", "qui est", "qui était", "dis moi", "dis-moi"),
+        "pronouns": ("tu", "toi", "vous", "moi", "je", "il", "elle", "lui", "nous", "ils",
+                     "elles", "eux", "ça", "cela", "ceci"),
+        "trail": ("s'il te plaît", "s'il vous plaît"),
+        "articles": ("le", "la", "les", "un", "une"),
+    },
+    "de": {
+        "contractions": (("was's", "was ist"), ("wer's", "wer ist")),
+        "fillers": ("bitte", "ähm", "also", "na"),
+        "lead": ("was ist", "was sind", "wer ist",
+                 "wer war", "wer sind", "erzähl mir von", "sag mir"),
+        "pronouns": ("du", "sie", "ich", "er", "es", "wir", "ihr", "das", "dies"),
+        "trail": ("bitte",),
+        "articles": ("der", "die", "das", "ein", "eine"),
+    },
+}
+
+_APOSTROPHES = re.compile(r"[’‘`´]")
+# sentence punctuation, dots and commas only when not part of a number
+_PUNCT = re.compile(r"[?!¿¡;:\"“”«»()\[\]{}]|(?<!\d)[.,]|[.,](?!\d)|(?<!\w)'|'(?!\w)")
+
+
+def _alternatives(words) -> str:
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+class QueryNormalizer:
+    """Canonical form of a question, so rephrasings share one cache entry.
+
+    Case folding, punctuation, contractions, filler words and neutral
+    question prefixes ("what is the ...") are handled per language, see
+    `RULES`. Unknown languages only get the generic steps. Never returns
+    an empty string for a non empty query.
+
+    `intent_matcher(query, lang)` returns the infobox intent the solver
+    would pick for a query, eg. "known_for" for "what is X known for". If
+    stripping the prefix changes it the prefix is kept.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Dict[str, tuple]]] = None,
+                 intent_matcher: Optional[Callable[[str, str], Optional[str]]] = None):
+        self.rules = RULES if rules is None else rules
+        self.intent_matcher = intent_matcher
+        self._lock = Lock()
+        self._compiled: Dict[str, tuple] = {}
+
+    def _patterns(self, lang: str) -> Tuple[Dict[str, str], Optional[Pattern], ...]:
+        if lang in self._compiled:
+            return self._compiled[lang]
+        rules = self.rules.get(lang, {})
+        contractions = dict(rules.get("contractions", ()))
+        patterns = (
+            contractions,
+            re.compile(r"(?<!\w)(" + _alternatives(contractions) + r")(?!\w)")
+            if contractions else None,
+            re.compile(r"^(?:(?:" + _alternatives(rules.get("fillers", ())) + r")\s+)*"
+                       r"(?:(?:" + _alternatives(rules["lead"]) + r")(?:\s+|$))+")
+            if rules.get("lead") else None,
+            frozenset(rules.get("pronouns", ())),
+            re.compile(r"(?:\s+(?:" + _alternatives(rules["trail"]) + r"))+$")
+            if rules.get("trail") else None,
+            re.compile(r"^(?:" + _alternatives(rules["articles"]) + r")\s+(?=\S)")
+            if rules.get("articles") else None,
+        )
+        with self._lock:
+            self._compiled[lang] = patterns
+        return patterns
+
+    def normalize(self, query: str, lang: Optional[str] = None) -> str:
+        if not query:
+            return query
+        text = _APOSTROPHES.sub("'", query.casefold())
+        table, contractions, lead, pronouns, trail, articles = \
+            self._patterns((lang or "").split("-")[0].lower())
+        if contractions:
+            text = contractions.sub(lambda m: table[m.group(1)], text)
+        text = " ".join(_PUNCT.sub(" ", text).split())
+        base = text
+        if trail:
+            text = trail.sub("", text)
+        if lead:
+            stripped = lead.sub("", text)
+            if stripped not in pronouns:
+                text = stripped
+        if articles and text.count(" ") > 1:
+            text = articles.sub("", text)
+        text = text.strip()
+        if text and text != base and self.intent_matcher and \
+                self.intent_matcher(text, lang) != self.intent_matcher(base, lang):
+            return base
+        return text or base or query
@@ -0,0 +1,130 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Condition
+from typing import Any, Dict, Iterator, Optional
+
+from .breaker import UpstreamError
+from .metrics import LatencyRecorder
+
+# lower goes first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: ContextVar[int] = ContextVar("ddg_request_priority", default=INTERACTIVE)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """requests made in this block (thread or asyncio task) use `priority`"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitedError(UpstreamError):
+    """request not sent, no rate limiter slot within the max wait"""
+
+
+class RateLimiter:
+    """Token bucket shared by all outbound DuckDuckGo requests.
+
+    Allows bursts of `burst` requests, then `rate` requests per second.
+    Callers waiting for a token are served by priority, then arrival, so
+    an interactive lookup always goes before queued background work.
+    Waiting longer than `max_wait` seconds raises `RateLimitedError`.
+    """
+
+    def __init__(self, rate: float = 2, burst: int = 5, max_wait: Optional[float] = 10):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self._cond = Condition()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queue = []
+        self._seq = itertools.count()
+        self.depth = {p: 0 for p in PRIORITIES}
+        self.max_depth = {p: 0 for p in PRIORITIES}
+        self.timeouts = {p: 0 for p in PRIORITIES}
+        self.waits = {p: LatencyRecorder() for p in PRIORITIES}
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: Optional[int] = None,
+                timeout: Optional[float] = None) -> float:
+        """block until a request may be sent, returns the seconds waited
+
+        `priority` defaults to the one set with `request_priority`,
+        `timeout` to `max_wait`
+        """
+        priority = current_priority() if priority is None else priority
+        timeout = self.max_wait if timeout is None else timeout
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            self.depth[priority] += 1
+            self.max_depth[priority] = max(self.max_depth[priority], self.depth[priority])
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = None
+                    if self._queue[0] == ticket:
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        delay = (1 - self._tokens) / self.rate
+                    if deadline is not None:
+                        if now >= deadline:
+                            self.timeouts[priority] += 1
+                            raise RateLimitedError(
+                                f"no DuckDuckGo request slot within {timeout}s")
+                        delay = deadline - now if delay is None else min(delay, deadline - now)
+                    self._cond.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self.depth[priority] -= 1
+                # the next in line re-checks the bucket
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self.waits[priority].observe(waited)
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill(time.monotonic())
+            data = {"rate": self.rate, "burst": self.burst, "tokens": round(self._tokens, 2)}
+            for priority, name in PRIORITIES.items():
+                data[f"{name}_queued"] = self.depth[priority]
+                data[f"{name}_max_queued"] = self.max_depth[priority]
+                data[f"{name}_timeouts"] = self.timeouts[priority]
+                for k, v in self.waits[priority].summary().items():
+                    data[f"{name}_wait_{k}"] = v
+        return data
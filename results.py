@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class Result:
+    """One "tell me more" step kept in a session, only what the skill reads.
+
+    `long_answer` returns a dict per sentence repeating the title and image,
+    a slotted record is a fraction of the size. Image urls are interned, the
+    same few urls repeat across every sentence and session.
+
+    Read-only item access (`result["summary"]`, `result.get("img")`) is kept
+    for code written against the plain dicts.
+    """
+    __slots__ = ("summary", "img")
+
+    def __init__(self, summary: str, img: Optional[str] = None):
+        self.summary = summary
+        self.img = sys.intern(img) if isinstance(img, str) else img
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Result":
+        return cls(data["summary"], data.get("img"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"summary": self.summary, "img": self.img}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Result):
+            return NotImplemented
+        return self.summary == other.summary and self.img == other.img
+
+    def __repr__(self) -> str:
+        return f"Result({self.summary!r}, {self.img!r})"
+
+
+def compact_results(results: Iterable[Dict[str, Any]]) -> List[Result]:
+    return [Result.from_dict(r) for r in results or []]
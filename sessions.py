@@ -0,0 +1,122 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Dict, Iterator, Optional
+
+
+class SessionStore:
+    """Bounded mapping of session_id -> per session search state.
+
+    Behaves like the plain dict the skill used to keep, but entries are
+    evicted least recently used first once `max_sessions` is reached and
+    dropped after `ttl` seconds without being accessed.
+    """
+
+    def __init__(self, max_sessions: int = 500, ttl: float = 900):
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl
+        self._lock = RLock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self.lru_evictions = 0
+        self.ttl_evictions = 0
+
+    def _expired(self, session_id: str, now: float) -> bool:
+        if not self.ttl or self.ttl <= 0:
+            return False
+        return now - self._last_access[session_id] > self.ttl
+
+    def _drop(self, session_id: str):
+        self._entries.pop(session_id, None)
+        self._last_access.pop(session_id, None)
+
+    def evict_expired(self) -> int:
+        """Remove every entry idle for longer than `ttl`, returns count removed"""
+        now = time.monotonic()
+        removed = 0
+        with self._lock:
+            # entries are kept in access order, oldest first
+            for session_id in list(self._entries):
+                if not self._expired(session_id, now):
+                    break
+                self._drop(session_id)
+                removed += 1
+            self.ttl_evictions += removed
+        return removed
+
+    def __setitem__(self, session_id: str, entry: Dict[str, Any]):
+        with self._lock:
+            self.evict_expired()
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            self._last_access[session_id] = time.monotonic()
+            while len(self._entries) > self.max_sessions:
+                oldest, _ = self._entries.popitem(last=False)
+                self._last_access.pop(oldest, None)
+                self.lru_evictions += 1
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            if session_id in self._entries and \
+                    self._expired(session_id, time.monotonic()):
+                self._drop(session_id)
+                self.ttl_evictions += 1
+            entry = self._entries[session_id]  # raises KeyError like a dict
+            self._entries.move_to_end(session_id)
+            self._last_access[session_id] = time.monotonic()
+            return entry
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._entries:
+                return False
+            if self._expired(session_id, time.monotonic()):
+                self._drop(session_id)
+                self.ttl_evictions += 1
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def get(self, session_id: str,
+            default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+
+    def pop(self, session_id: str,
+            default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._last_access.pop(session_id, None)
+            return self._entries.pop(session_id, default)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_access.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """size and eviction counters, for logging/metrics"""
+        return {"size": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "ttl": self.ttl,
+                "lru_evictions": self.lru_evictions,
+                "ttl_evictions": self.ttl_evictions}
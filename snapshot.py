@@ -0,0 +1,234 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Snapshots of the DuckDuckGo skill answer and image caches.
+
+    python -m ovos_skill_ddg.snapshot build queries.txt top.tar.gz --lang en-us --images
+    python -m ovos_skill_ddg.snapshot export top.tar.gz
+    python -m ovos_skill_ddg.snapshot import top.tar.gz
+
+a snapshot is a gzipped tar holding
+    manifest.json  {"format": "ovos-skill-ddg-cache", "version": 1, "created": ...}
+    answers.jsonl  one {"key", "ttl", "results"} per line, ttl is the lifetime
+                   left when the snapshot was created
+    images.json    {image url: member name}
+    images/        GUI sized images
+"""
+import argparse
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+import zlib
+from os.path import basename, join
+from typing import Any, Dict, Optional
+
+from ovos_config.locations import get_xdg_cache_save_path
+from ovos_utils.log import LOG
+
+from .cache import AnswerCache
+from .images import ImageCache
+
+FORMAT = "ovos-skill-ddg-cache"
+VERSION = 1
+DEFAULT_CACHE_DIR = join(get_xdg_cache_save_path(), "ovos-skill-ddg.openvoiceos")
+# truncated or corrupt archives and members
+_BROKEN = (tarfile.TarError, KeyError, ValueError, TypeError, EOFError, zlib.error)
+
+
+class SnapshotError(ValueError):
+    """not a cache snapshot, or written by a newer version"""
+
+
+def _add(tar: tarfile.TarFile, name: str, data: bytes, mtime: float):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(mtime)
+    tar.addfile(info, io.BytesIO(data))
+
+
+def _manifest(tar: tarfile.TarFile) -> Dict[str, Any]:
+    try:
+        manifest = json.load(tar.extractfile("manifest.json"))
+    except (KeyError, ValueError, TypeError) as e:
+        raise SnapshotError(f"not a DDG cache snapshot: {e}")
+    if not isinstance(manifest, dict):
+        raise SnapshotError("not a DDG cache snapshot")
+    version = manifest.get("version")
+    if manifest.get("format") != FORMAT or not isinstance(version, int):
+        raise SnapshotError("not a DDG cache snapshot")
+    if version > VERSION:
+        raise SnapshotError(f"snapshot version {version} is newer than {VERSION}")
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with tarfile.open(path, "r:gz") as tar:
+            return _manifest(tar)
+    except _BROKEN as e:
+        raise SnapshotError(f"not a DDG cache snapshot: {e}")
+
+
+def _valid_entry(entry: Any) -> bool:
+    """answers the skill can speak, a list of results with a summary each"""
+    if not isinstance(entry, dict) or not isinstance(entry.get("key"), str) \
+            or not isinstance(entry.get("ttl"), (int, float)):
+        return False
+    results = entry.get("results")
+    return isinstance(results, list) and bool(results) and all(
+        isinstance(r, dict) and isinstance(r.get("summary"), str) for r in results)
+
+
+def export_snapshot(path: str, answer_cache: AnswerCache,
+                    image_cache: Optional[ImageCache] = None) -> Dict[str, Any]:
+    """write the valid cached answers, and their cached images, to `path`
+
+    returns the manifest
+    """
+    created = time.time()
+    answers = [(key, expires - created, results)
+               for key, expires, results in answer_cache.entries() if expires > created]
+    images = {}
+    if image_cache is not None:
+        for _, _, results in answers:
+            for result in results:
+                url = result.get("img")
+                local = image_cache.cached(url) if url and url not in images else None
+                if local:
+                    images[url] = (f"images/{basename(local)}", local)
+    manifest = {"format": FORMAT, "version": VERSION, "created": created,
+                "answers": len(answers), "images": len(images)}
+    tmp = f"{path}.tmp"
+    with tarfile.open(tmp, "w:gz") as tar:
+        # first, so read_manifest does not decompress everything
+        _add(tar, "manifest.json", json.dumps(manifest).encode("utf-8"), created)
+        _add(tar, "answers.jsonl", b"".join(
+            json.dumps({"key": key, "ttl": ttl, "results": results}).encode("utf-8") + b"\n"
+            for key, ttl, results in answers), created)
+        _add(tar, "images.json", json.dumps(
+            {url: member for url, (member, _) in images.items()}).encode("utf-8"), created)
+        for member, local in images.values():
+            tar.add(local, arcname=member)
+    os.replace(tmp, path)
+    return manifest
+
+
+def import_snapshot(path: str, answer_cache: AnswerCache,
+                    image_cache: Optional[ImageCache] = None,
+                    imported_at: Optional[float] = None) -> Dict[str, Any]:
+    """add the snapshot answers and images missing from the caches
+
+    answers expire `ttl` seconds after `imported_at` (now by default),
+    newer cached answers are kept, malformed ones are skipped. Returns the
+    number of answers and images added
+    """
+    imported_at = time.time() if imported_at is None else imported_at
+    now = time.time()
+    try:
+        with tarfile.open(path, "r:gz") as tar:
+            manifest = _manifest(tar)
+            entries = []
+            skipped = 0
+            for line in tar.extractfile("answers.jsonl"):
+                entry = json.loads(line)
+                if not _valid_entry(entry):
+                    skipped += 1
+                    continue
+                if imported_at + entry["ttl"] > now:
+                    entries.append((entry["key"], imported_at + entry["ttl"], entry["results"]))
+            answers = answer_cache.load(entries)
+            images = 0
+            if image_cache is not None:
+                for url, member in json.load(tar.extractfile("images.json")).items():
+                    if image_cache.cached(url):
+                        continue
+                    data = tar.extractfile(member)
+                    if data is not None and image_cache.put(url, data.read()):
+                        images += 1
+    except _BROKEN as e:
+        raise SnapshotError(f"broken DDG cache snapshot: {e}")
+    if skipped:
+        LOG.warning(f"DDG cache snapshot {path}: {skipped} malformed answers skipped")
+    LOG.info(f"DDG cache snapshot {path}: {answers} answers and {images} images imported")
+    return {"created": manifest["created"], "imported_at": imported_at,
+            "answers": answers, "images": images}
+
+
+def build_snapshot(queries, path: str, lang: str = "en-us", units: str = "metric",
+                   ttl: float = 7 * 86400, rate: float = 2,
+                   images: bool = False) -> Dict[str, Any]:
+    """look up `queries` on DuckDuckGo and write the answers to a snapshot"""
+    from .normalize import QueryNormalizer
+    from .ratelimit import RateLimiter
+    from .solver import PooledDuckDuckGoSolver
+    queries = [q.strip() for q in queries if q.strip()]
+    solver = PooledDuckDuckGoSolver(limiter=RateLimiter(rate=rate, max_wait=None))
+    normalizer = QueryNormalizer()
+    answer_cache = AnswerCache(max_entries=len(queries) or 1, ttl=ttl)
+    with tempfile.TemporaryDirectory() as tmp:
+        image_cache = ImageCache(tmp, max_bytes=2 ** 40, session=solver.session,
+                                 limiter=solver.limiter) if images else None
+        for query in queries:
+            query = normalizer.normalize(query, lang)
+            if answer_cache.has(query, lang, units):
+                continue
+            results = solver.long_answer(query, lang=lang, units=units)
+            if not results:
+                LOG.info(f"no DDG answer for '{query}', skipped")
+                continue
+            answer_cache.put(query, lang, units, results)
+            if image_cache is not None and results[0].get("img"):
+                image_cache.get(results[0]["img"])
+        return export_snapshot(path, answer_cache, image_cache)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="look up a file of queries, one per line")
+    build.add_argument("queries")
+    build.add_argument("snapshot")
+    build.add_argument("--lang", default="en-us")
+    build.add_argument("--units", default="metric")
+    build.add_argument("--ttl", type=float, default=7 * 86400,
+                       help="seconds answers stay valid after import")
+    build.add_argument("--rate", type=float, default=2, help="max requests per second")
+    build.add_argument("--images", action="store_true", help="include GUI sized images")
+    for name, description in (("export", "snapshot of a skill cache directory"),
+                              ("import", "seed a skill cache directory")):
+        command = commands.add_parser(name, help=description)
+        command.add_argument("snapshot")
+        command.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        with open(args.queries) as f:
+            result = build_snapshot(f, args.snapshot, args.lang, args.units,
+                                    ttl=args.ttl, rate=args.rate, images=args.images)
+    else:
+        answer_cache = AnswerCache(max_entries=1, path=join(args.cache_dir, "answers.db"))
+        image_cache = ImageCache(join(args.cache_dir, "images"))
+        try:
+            if args.command == "export":
+                result = export_snapshot(args.snapshot, answer_cache, image_cache)
+            else:
+                result = import_snapshot(args.snapshot, answer_cache, image_cache)
+        finally:
+            answer_cache.close()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
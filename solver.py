@@ -0,0 +1,183 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from langcodes import closest_match
+from ovos_ddg_solver import DuckDuckGoSolver
+from ovos_utils.log import LOG
+from padacioso import IntentContainer
+from quebra_frases import sentence_tokenize
+
+from .breaker import CircuitBreaker, CircuitOpenError, UpstreamError
+from .lookup import REQUEST_FAILED
+from .ratelimit import RateLimiter
+from .transport import DDG_API_URL, make_http_session
+
+
+class InProcessIntentContainer(IntentContainer):
+    """padacioso container matching in the calling thread
+
+    padacioso spins up a process pool for every `calc_intent` call, forking
+    from the skill's threaded handlers is slow and can deadlock under load
+    """
+
+    def calc_intents(self, query: str) -> Iterator[dict]:
+        excluded_intents = self._filter(query)
+        for intent_name, regexes in self.intent_samples.items():
+            if intent_name in excluded_intents:
+                continue
+            res = self._match(query, intent_name, regexes)
+            if res is not None:
+                yield res
+
+
+class PooledDuckDuckGoSolver(DuckDuckGoSolver):
+    """DuckDuckGoSolver sending its API requests through a shared http session
+
+    the upstream solver calls `requests.get` directly, paying for a new
+    TCP/TLS handshake on every question. Infobox intents are matched
+    in-process, see `InProcessIntentContainer`
+
+    if a `breaker` is given requests fail fast while it is open, and
+    `long_answer` raises `UpstreamError` instead of returning no results
+    when DuckDuckGo could not be reached
+
+    with a `limiter` every request waits for a slot first, at the priority
+    set with `ratelimit.request_priority`
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 session: Optional[requests.Session] = None,
+                 timeout: Tuple[float, float] = (3.05, 10),
+                 breaker: Optional[CircuitBreaker] = None,
+                 limiter: Optional[RateLimiter] = None):
+        super().__init__(config)
+        self.session = session or make_http_session()
+        self.timeout = timeout
+        self.breaker = breaker
+        self.limiter = limiter
+        self.api_url = DDG_API_URL
+        self._local = threading.local()
+
+    def register_infobox_intent(self, key: str, samples: List[str], lang: str) -> None:
+        lang = lang.split("-")[0]
+        if lang not in self.intent_matchers:
+            self.intent_matchers[lang] = InProcessIntentContainer()
+        super().register_infobox_intent(key, samples, lang)
+
+    def api_params(self, query: str, lang: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """DuckDuckGo API query parameters, None if the lang is not supported"""
+        lang = lang or self.default_lang
+        best_lang, distance = closest_match(lang, self.LOCALE_MAPPING)
+        if distance > 10:
+            LOG.debug(f"Unsupported DDG locale: {lang}")
+            return None
+        return {"format": "json",
+                "kl": self.LOCALE_MAPPING[best_lang],
+                "q": query}
+
+    @contextmanager
+    def request_scope(self, preloaded: Optional[Dict[Tuple[str, str], Any]] = None):
+        """memoize API responses for the current thread
+
+        a single `long_answer` asks for the same query several times (image,
+        infobox and summary), inside a scope it is only requested once.
+        `preloaded` responses, keyed by (q, kl) params, are served without
+        any request, `REQUEST_FAILED` ones as a failed request
+        """
+        memo = getattr(self._local, "memo", None)
+        if memo is not None:  # nested scope
+            memo.update(preloaded or {})
+            yield
+            return
+        self._local.memo = dict(preloaded or {})
+        try:
+            yield
+        finally:
+            self._local.memo = None
+
+    def long_answer(self, query: str,
+                    lang: Optional[str] = None,
+                    units: Optional[str] = None) -> List[Dict[str, str]]:
+        with self.request_scope():
+            self._local.failed = False
+            results = super().long_answer(query, lang=lang, units=units)
+            if self.breaker and not results and self._local.failed:
+                raise UpstreamError(f"DuckDuckGo request failed for '{query}'")
+            return results
+
+    def stream_answer(self, query: str,
+                      lang: Optional[str] = None,
+                      units: Optional[str] = None) -> Iterator[Dict[str, str]]:
+        """`long_answer` steps, yielded one at a time
+
+        plain summaries are split and yielded as soon as the API response is
+        in, so the first sentence can be spoken while the caller is still
+        consuming the rest. Infobox answers and the spoken answer fallback
+        are built by `long_answer` as usual
+        """
+        with self.request_scope():
+            self._local.failed = False
+            img = self.get_image(query, lang=lang, units=units)
+            intent, kw = self.match_infobox_intent(query, lang or self.default_lang)
+            if not intent or intent == "question":
+                data = self.extract_and_search(kw, lang=lang, units=units)
+                sentences = [s for s in sentence_tokenize(data.get("AbstractText", "")) if s]
+                if sentences:
+                    for sentence in sentences:
+                        yield {"title": kw, "summary": sentence, "img": img}
+                    return
+            if self.breaker and self._local.failed:
+                raise UpstreamError(f"DuckDuckGo request failed for '{query}'")
+            yield from self.long_answer(query, lang=lang, units=units)
+
+    def get_data(self, query: str,
+                 lang: Optional[str] = None,
+                 units: Optional[str] = None) -> Dict[str, Any]:
+        params = self.api_params(query, lang)
+        if params is None:
+            return {}
+        memo = getattr(self._local, "memo", None)
+        key = (params["q"], params["kl"])
+        if memo is not None and key in memo:
+            if memo[key] is REQUEST_FAILED:
+                self._local.failed = True
+                return {}
+            return memo[key]
+        # fail fast while open instead of queueing for a token first
+        if self.breaker and self.breaker.is_open():
+            raise CircuitOpenError("DuckDuckGo circuit is open")
+        if self.limiter:
+            self.limiter.acquire()
+        if self.breaker and not self.breaker.allow():
+            raise CircuitOpenError("DuckDuckGo circuit is open")
+        try:
+            data = self.session.get(self.api_url, params=params,
+                                    timeout=self.timeout).json()
+        except Exception as e:
+            LOG.debug(f"DDG request failed: {e}")
+            self._local.failed = True
+            if self.breaker:
+                self.breaker.record_failure()
+            if memo is not None:
+                # not asked again by the next stage of the same answer
+                memo[key] = REQUEST_FAILED
+            return {}
+        if self.breaker:
+            self.breaker.record_success()
+        if memo is not None:
+            memo[key] = data
+        return data
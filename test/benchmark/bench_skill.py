@@ -0,0 +1,170 @@
+"""Offline benchmark for DuckDuckGoSkill
+
+starts a local fake DuckDuckGo API, then drives the skill with concurrent
+`question:query` (common query) and search intent traffic through a FakeBus
+
+    python test/benchmark/bench_skill.py --requests 500 --concurrency 16
+
+reports throughput, latency percentiles and memory growth, use
+--max-p95/--min-throughput to fail (exit code 1) on regressions in CI
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from ovos_bus_client.message import Message
+from ovos_bus_client.session import Session
+from ovos_utils.fakebus import FakeBus
+from ovos_utils.log import LOG
+
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.metrics import LatencyRecorder
+
+from fake_ddg import FakeDuckDuckGo
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="total requests to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--unique", type=int, default=50, help="number of distinct questions")
+    parser.add_argument("--sessions", type=int, default=100, help="number of distinct session ids")
+    parser.add_argument("--intent-ratio", type=float, default=0.2,
+                        help="fraction of traffic sent as search intents instead of common query")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake upstream latency in seconds")
+    parser.add_argument("--payload", type=int, default=1000, help="fake AbstractText size in characters")
+    parser.add_argument("--gui", action="store_true", help="report a connected GUI to the skill")
+    parser.add_argument("--lang", default="en-us")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--settings", type=json.loads, default={},
+                        help='skill settings as json, eg. \'{"cq_timeout": 0.5}\'')
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    parser.add_argument("--max-p95", type=float, help="fail if p95 latency (seconds) is higher")
+    parser.add_argument("--min-throughput", type=float, help="fail if requests/s is lower")
+    return parser.parse_args(argv)
+
+
+class BenchmarkSkill(DuckDuckGoSkill):
+    """applies the --settings before `initialize` reads them"""
+    bench_settings: dict = {}
+
+    def initialize(self):
+        # nothing left over from a previous run's settings file
+        self.settings.clear()
+        self.settings.update(self.bench_settings)
+        super().initialize()
+
+
+def max_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS
+
+
+def run(args) -> dict:
+    LOG.set_level("ERROR")
+    bus = FakeBus()
+    bus.on("gui.status.request",
+           lambda m: bus.emit(m.response({"connected": args.gui})))
+    answered = {"count": 0}
+    lock = Lock()
+
+    def on_response(message):
+        if message.data.get("answer"):
+            with lock:
+                answered["count"] += 1
+
+    bus.on("question:query.response", on_response)
+
+    with FakeDuckDuckGo(latency=args.latency, payload_size=args.payload) as upstream:
+        BenchmarkSkill.bench_settings = args.settings
+        load_start = time.perf_counter()
+        skill = BenchmarkSkill(bus=bus, skill_id="ddg.benchmark")
+        load_time = time.perf_counter() - load_start
+        skill.duck.api_url = upstream.url
+
+        rng = random.Random(args.seed)
+        questions = [f"what is benchmark topic {i}" for i in range(args.unique)]
+        plan = [(rng.choice(questions),
+                 rng.random() < args.intent_ratio,
+                 Session(f"satellite-{rng.randrange(args.sessions)}"))
+                for _ in range(args.requests)]
+        latency = LatencyRecorder(window=args.requests)
+        errors = []
+
+        def send(question: str, is_intent: bool, sess: Session):
+            context = {"session": sess.serialize()}
+            start = time.perf_counter()
+            try:
+                if is_intent:
+                    skill.handle_search(Message("search_duck.intent",
+                                                {"query": question, "lang": args.lang}, context))
+                else:
+                    bus.emit(Message("question:query",
+                                     {"phrase": question, "lang": args.lang}, context))
+            except Exception as e:
+                errors.append(repr(e))
+            with lock:
+                latency.observe(time.perf_counter() - start)
+
+        rss_before = max_rss_kb()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            for _ in pool.map(lambda p: send(*p), plan):
+                pass
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "elapsed": elapsed,
+            "throughput": args.requests / elapsed,
+            "latency": latency.summary(),
+            "common_query_answers": answered["count"],
+            "errors": len(errors),
+            "upstream_requests": upstream.requests,
+            "max_rss_kb_before": rss_before,
+            "max_rss_kb_after": max_rss_kb(),
+            "startup": {"load": load_time, **skill.startup_times},
+            "skill": skill.get_metrics()
+        }
+        skill.shutdown()
+    return report
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+    lat = report["latency"]
+    print(f"requests:    {report['requests']} ({report['errors']} errors), "
+          f"concurrency {report['concurrency']}")
+    print(f"throughput:  {report['throughput']:.1f} req/s")
+    print(f"latency:     p50 {lat['p50'] * 1000:.1f}ms  p95 {lat['p95'] * 1000:.1f}ms  "
+          f"p99 {lat['p99'] * 1000:.1f}ms")
+    print(f"upstream:    {report['upstream_requests']} requests")
+    print(f"startup:     skill load {report['startup']['load'] * 1000:.1f}ms, "
+          f"solver {report['startup'].get('solver', 0) * 1000:.1f}ms")
+    print(f"memory:      max rss {report['max_rss_kb_before']} -> {report['max_rss_kb_after']} KB")
+    print(f"sessions:    {report['skill']['sessions']}")
+    print(f"cache:       {report['skill']['cache']}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if args.max_p95 is not None and lat["p95"] > args.max_p95:
+        print(f"FAIL: p95 {lat['p95']:.3f}s > {args.max_p95}s")
+        failed = True
+    if args.min_throughput is not None and report["throughput"] < args.min_throughput:
+        print(f"FAIL: throughput {report['throughput']:.1f} < {args.min_throughput} req/s")
+        failed = True
+    return 1 if failed or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Local stand-in for the DuckDuckGo instant answer API, for offline benchmarks."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SENTENCE = "This is a benchmark answer sentence about {query}. "
+
+
+class FakeDuckDuckGo:
+    """threaded http server answering every query after `latency` seconds
+
+    `payload_size` is the approximate length in characters of AbstractText
+    """
+
+    def __init__(self, latency: float = 0.05, payload_size: int = 1000,
+                 related_topics: int = 5, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.payload_size = payload_size
+        self.related_topics = related_topics
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def answer(self, query: str) -> dict:
+        sentence = SENTENCE.format(query=query)
+        repeats = max(1, self.payload_size // len(sentence))
+        return {
+            "Heading": query,
+            "AbstractText": (sentence * repeats).strip(),
+            "Image": "/i/benchmark.png",
+            "Infobox": "",
+            "RelatedTopics": [{"Text": f"Related topic {i} about {query}",
+                               "Icon": {"URL": f"/i/related{i}.png"}}
+                              for i in range(self.related_topics)]
+        }
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                time.sleep(fake.latency)
+                body = json.dumps(fake.answer(query)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeDuckDuckGo":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
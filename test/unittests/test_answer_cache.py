@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.cache import AnswerCache
+
+RESULTS = [{"title": "speed of light", "summary": "299 792 458 m/s", "img": "/light.jpg"}]
+
+
+class TestAnswerCache(unittest.TestCase):
+    def test_memory_tier(self):
+        cache = AnswerCache(max_entries=2)
+        self.assertIsNone(cache.get("speed of light", "en-us", "metric"))
+        cache.put("speed of light", "en-us", "metric", RESULTS)
+        self.assertEqual(cache.get("  Speed of   LIGHT", "en-US", "metric"), RESULTS)
+        self.assertIsNone(cache.get("speed of light", "pt-pt", "metric"))
+        self.assertIsNone(cache.get("speed of light", "en-us", "imperial"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 3)
+
+        cache.put("a", "en-us", "metric", RESULTS)
+        cache.put("b", "en-us", "metric", RESULTS)
+        self.assertIsNone(cache.get("speed of light", "en-us", "metric"))
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_ttl(self):
+        cache = AnswerCache(ttl=10)
+        with patch("ovos_skill_ddg.cache.time.time") as now:
+            now.return_value = 100
+            cache.put("speed of light", "en-us", "metric", RESULTS)
+            cache.put("sound", "en-us", "metric", RESULTS, ttl=100)
+            now.return_value = 111
+            self.assertIsNone(cache.get("speed of light", "en-us", "metric"))
+            self.assertEqual(cache.get("sound", "en-us", "metric"), RESULTS)
+
+    def test_negative_ttl(self):
+        cache = AnswerCache(ttl=100, negative_ttl=10)
+        with patch("ovos_skill_ddg.cache.time.time") as now:
+            now.return_value = 100
+            cache.put("asdfgh", "en-us", "metric", [])
+            self.assertEqual(cache.get("asdfgh", "en-us", "metric"), [])
+            now.return_value = 111
+            self.assertIsNone(cache.get("asdfgh", "en-us", "metric"))
+        self.assertEqual(cache.stats()["negative_hits"], 1)
+
+    def test_stale_while_revalidate(self):
+        cache = AnswerCache(ttl=10, max_stale=100)
+        with patch("ovos_skill_ddg.cache.time.time") as now:
+            now.return_value = 100
+            cache.put("speed of light", "en-us", "metric", RESULTS)
+            cache.put("asdfgh", "en-us", "metric", [], ttl=10)
+            self.assertEqual(cache.get_or_stale("speed of light", "en-us", "metric", 50),
+                             (RESULTS, False))
+            now.return_value = 140
+            self.assertIsNone(cache.get("speed of light", "en-us", "metric"))
+            self.assertEqual(cache.get_or_stale("speed of light", "en-us", "metric", 50),
+                             (RESULTS, True))
+            self.assertEqual(cache.get_or_stale("asdfgh", "en-us", "metric", 50),
+                             (None, False))
+            # past the hard ttl
+            now.return_value = 170
+            self.assertEqual(cache.get_or_stale("speed of light", "en-us", "metric", 50),
+                             (None, False))
+            self.assertEqual(cache.get_stale("speed of light", "en-us", "metric"), RESULTS)
+        self.assertEqual(cache.stats()["stale_hits"], 2)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "answers.db")
+            cache = AnswerCache(path=path)
+            cache.put("speed of light", "en-us", "metric", RESULTS)
+            cache.close()
+
+            cache = AnswerCache(path=path)
+            self.assertTrue(cache.stats()["persistent"])
+            self.assertEqual(cache.get("speed of light", "en-us", "metric"), RESULTS)
+            cache.close()
+
+
+class TestSkillCache(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.duck.long_answer = Mock(return_value=RESULTS)
+
+    def test_repeat_question_is_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                             ("299 792 458 m/s", 0.6))
+        self.assertEqual(self.skill.duck.long_answer.call_count, 1)
+        self.assertEqual(self.skill.answer_cache.stats()["hits"], 2)
+
+    def test_known_miss_is_cached(self):
+        self.skill.duck.long_answer.return_value = []
+        for _ in range(3):
+            self.assertIsNone(self.skill.match_common_query("asdfgh", "en-us"))
+        self.assertEqual(self.skill.duck.long_answer.call_count, 1)
+        self.assertEqual(self.skill.answer_cache.stats()["negative_hits"], 2)
+
+    def test_stale_answer_is_refreshed(self):
+        self.skill.settings["cache_hard_ttl"] = 86400 * 7
+        try:
+            self.skill.answer_cache.put("speed of light", "en-us", "metric",
+                                        [{"title": "speed of light", "summary": "old"}], ttl=-1)
+            self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                             ("old", 0.6))
+            self.skill.background.shutdown(wait=True)
+            self.skill.duck.long_answer.assert_called_once()
+            self.assertEqual(self.skill.answer_cache.get("speed of light", "en-us", "metric"),
+                             RESULTS)
+        finally:
+            self.skill.settings.pop("cache_hard_ttl", None)
+
+    def test_prefilter_is_cached(self):
+        self.skill.vocab_matcher.match = Mock(return_value=True)
+        for _ in range(3):
+            self.assertIsNone(self.skill.match_common_query("will it rain", "en-us"))
+        self.assertEqual(self.skill.vocab_matcher.match.call_count, 1)
+        self.skill.duck.long_answer.assert_not_called()
@@ -0,0 +1,88 @@
+import sys
+import unittest
+from os.path import dirname, join
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.breaker import CircuitBreaker, UpstreamError
+from ovos_skill_ddg.lookup import AsyncLookupEngine
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+sys.path.append(join(dirname(dirname(__file__)), "benchmark"))
+from fake_ddg import FakeDuckDuckGo
+
+
+class TestAsyncLookupEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.upstream = FakeDuckDuckGo(latency=0.2, payload_size=200).start()
+        cls.solver = PooledDuckDuckGoSolver()
+        cls.solver.api_url = cls.upstream.url
+        cls.engine = AsyncLookupEngine(cls.solver)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.shutdown()
+        cls.upstream.stop()
+
+    def setUp(self):
+        self.upstream.requests = 0
+
+    def test_long_answer(self):
+        results = self.engine.run(self.engine.long_answer("what is the moon", "en-us"))
+        self.assertTrue(results[0]["summary"].startswith("This is a benchmark answer"))
+        self.assertEqual(results[0]["img"], "https://duckduckgo.com/i/benchmark.png")
+        # the response is reused by every solver stage
+        self.assertEqual(self.upstream.requests, 1)
+
+    def test_concurrent_lookups(self):
+        futures = [self.engine.submit(self.engine.get_image(f"topic {i}", "en-us"))
+                   for i in range(8)]
+        for f in futures:
+            self.assertEqual(f.result(timeout=1.5), "https://duckduckgo.com/i/benchmark.png")
+        self.assertEqual(self.upstream.requests, 8)
+
+    def test_submit_once(self):
+        futures = [self.engine.submit_once("moon", self.engine.get_data, "moon", "en-us")
+                   for _ in range(4)]
+        self.assertEqual(len(set(futures)), 1)
+        self.assertEqual(futures[0].result()["Heading"], "moon")
+        self.assertEqual(self.upstream.requests, 1)
+
+    def test_failed_request_not_repeated(self):
+        breaker = CircuitBreaker(failure_threshold=5)
+        solver = PooledDuckDuckGoSolver(breaker=breaker)
+        solver.api_url = "http://127.0.0.1:9/"  # nothing listens there
+        solver.session = Mock()
+        solver.session.get.side_effect = ConnectionError
+        engine = AsyncLookupEngine(solver)
+        try:
+            with self.assertRaises(UpstreamError):
+                engine.run(engine.long_answer("what is the moon", "en-us"))
+        finally:
+            engine.shutdown()
+        # no blocking retry of the failed request, only the keyword fallback
+        # is asked, once for every solver stage
+        queries = [c.kwargs["params"]["q"] for c in solver.session.get.call_args_list]
+        self.assertEqual(queries, ["moon"])
+        self.assertEqual(breaker.stats()["failures"], 2)
+
+
+class TestSkillAsyncLookups(unittest.TestCase):
+    def test_cache_filled_from_engine(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.engine = AsyncLookupEngine(skill.duck)
+
+        async def no_data(*args):
+            return {}
+
+        skill.engine._request = no_data
+        skill.duck.long_answer = Mock(return_value=[{"title": "moon", "summary": "42"}])
+        try:
+            self.assertEqual(skill.match_common_query("what is the moon", "en-us"), ("42", 0.6))
+            self.assertEqual(skill.match_common_query("what is the moon", "en-us"), ("42", 0.6))
+            self.assertEqual(skill.duck.long_answer.call_count, 1)
+            self.assertEqual(skill.get_metrics()["latency"]["fetch"]["en-us"]["count"], 1)
+        finally:
+            skill.shutdown()
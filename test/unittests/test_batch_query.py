@@ -0,0 +1,48 @@
+import json
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.ratelimit import BACKGROUND, current_priority
+
+
+class TestBatchQuery(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.bus.emitted_msgs = []
+
+        def get_msg(msg):
+            self.bus.emitted_msgs.append(json.loads(msg))
+
+        self.bus.on("message", get_msg)
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+
+        self.priorities = []
+
+        def answer(query, lang=None, units=None):
+            self.priorities.append(current_priority())
+            if query == "asdfgh":
+                return []
+            return [{"title": query, "summary": f"answer to {query} in {lang}"}]
+
+        self.skill.duck.long_answer = Mock(side_effect=answer)
+
+    def test_batch_query(self):
+        self.skill.answer_cache.put("cached question", "pt-pt", "metric",
+                                    [{"title": "cached", "summary": "from cache"}])
+        self.bus.emit(Message("ovos.ddg.batch_query",
+                              {"queries": ["speed of light", "Speed of  light",
+                                           "asdfgh", "cached question"],
+                               "lang": "pt-pt", "units": "metric"}))
+        reply = [m for m in self.bus.emitted_msgs
+                 if m["type"] == "ovos.ddg.batch_query.response"][0]
+        answers = [a["answer"] for a in reply["data"]["answers"]]
+        self.assertEqual(answers, ["answer to speed of light in pt-pt",
+                                   "answer to speed of light in pt-pt",
+                                   None,
+                                   "from cache"])
+        self.assertEqual(reply["data"]["answers"][1]["query"], "Speed of  light")
+        # repeats deduplicated, cached answers not fetched
+        self.assertEqual(self.skill.duck.long_answer.call_count, 2)
+        self.assertEqual(self.priorities, [BACKGROUND] * 2)
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.breaker import CircuitBreaker, CircuitOpenError, UpstreamError
+from ovos_skill_ddg.ratelimit import RateLimiter
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+RESULTS = [{"title": "speed of light", "summary": "299 792 458 m/s"}]
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_transitions(self):
+        changes = []
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                                 on_state_change=lambda new, old: changes.append((old, new)))
+        with patch("ovos_skill_ddg.breaker.time.monotonic") as now:
+            now.return_value = 100
+            breaker.record_failure()
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            self.assertFalse(breaker.allow())
+
+            # a single half open probe after reset_timeout
+            now.return_value = 111
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+            now.return_value = 122
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertTrue(breaker.allow())
+
+        self.assertEqual(changes, [("closed", "open"), ("open", "half_open"),
+                                   ("half_open", "open"), ("open", "half_open"),
+                                   ("half_open", "closed")])
+        self.assertEqual(breaker.stats()["trips"], 2)
+        self.assertEqual(breaker.stats()["rejected"], 2)
+
+    def test_solver_fails_fast(self):
+        session = Mock()
+        session.get.side_effect = ConnectionError
+        solver = PooledDuckDuckGoSolver(session=session,
+                                        breaker=CircuitBreaker(failure_threshold=2))
+        with self.assertRaises(UpstreamError):
+            solver.long_answer("speed of light", lang="en-us")
+        self.assertEqual(solver.breaker.state, CircuitBreaker.OPEN)
+        calls = session.get.call_count
+        with self.assertRaises(CircuitOpenError):
+            solver.long_answer("speed of light", lang="en-us")
+        self.assertEqual(session.get.call_count, calls)
+
+    def test_open_before_rate_limit(self):
+        limiter = RateLimiter(rate=1, burst=1, max_wait=5)
+        limiter.acquire()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        solver = PooledDuckDuckGoSolver(session=Mock(), breaker=breaker, limiter=limiter)
+        with self.assertRaises(CircuitOpenError):
+            solver.get_data("speed of light", lang="en-us")
+        # rejected without waiting for, or using up, a token
+        self.assertEqual(limiter.stats()["interactive_wait_count"], 1)
+        # the check does not take the half open probe
+        with patch("ovos_skill_ddg.breaker.time.monotonic", return_value=10 ** 9):
+            self.assertFalse(breaker.is_open())
+            self.assertTrue(breaker.allow())
+            self.assertTrue(breaker.is_open())
+
+
+class TestSkillCircuit(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.schedule_event = Mock()
+
+    def test_serves_stale_while_open(self):
+        self.skill.answer_cache.put("speed of light", "en-us", "metric", RESULTS, ttl=-1)
+        self.skill.duck.long_answer = Mock(side_effect=CircuitOpenError)
+        self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                         ("299 792 458 m/s", 0.6))
+        self.assertIsNone(self.skill.match_common_query("asdfgh", "en-us"))
+        # outages are not remembered as known misses
+        self.assertFalse(self.skill.answer_cache.has("asdfgh", "en-us", "metric"))
+
+    def test_state_announced_and_probed(self):
+        messages = []
+        self.bus.on("ovos.ddg.circuit", messages.append)
+        self.skill.duck.session = Mock()
+        self.skill.duck.session.get.side_effect = ConnectionError
+        for _ in range(self.skill.breaker.failure_threshold):
+            self.skill.duck.get_data("speed of light", lang="en-us")
+        self.assertEqual(messages[-1].data, {"state": "open", "previous": "closed"})
+        self.skill.schedule_event.assert_called_once_with(
+            self.skill.probe_upstream, self.skill.breaker.reset_timeout, name="DDGProbe")
+
+        # upstream is back, the probe closes the circuit
+        self.skill.duck.session.get.side_effect = None
+        self.skill.duck.session.get.return_value.json.return_value = {"Abstract": ""}
+        self.skill.breaker.opened_at -= self.skill.breaker.reset_timeout
+        self.skill.probe_upstream()
+        self.assertEqual(self.skill.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(messages[-1].data, {"state": "closed", "previous": "half_open"})
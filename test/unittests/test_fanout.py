@@ -0,0 +1,80 @@
+import json
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+
+PT = [{"title": "pastel de nata", "summary": "O pastel de nata é um doce português."}]
+
+
+def slow_answers(answers, delays):
+    def _fetch(query, lang, units):
+        time.sleep(delays.get(lang, 0))
+        return answers.get(lang, [])
+    return Mock(side_effect=_fetch)
+
+
+@patch("ovos_skill_ddg.can_use_gui", Mock(return_value=False))
+class TestFanout(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.bus.emitted_msgs = []
+        self.bus.on("message", lambda msg: self.bus.emitted_msgs.append(json.loads(msg)))
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.settings["multilang_fanout"] = True
+        self.skill.settings["fanout_langs"] = ["pt-PT", "en-US"]
+
+    def tearDown(self):
+        for k in ("multilang_fanout", "fanout_langs"):
+            self.skill.settings.pop(k, None)
+        self.skill.answer_cache.clear()
+
+    def test_langs(self):
+        self.assertEqual(self.skill.fanout_langs("en-us"), ["en-us", "pt-PT"])
+        self.skill.settings["multilang_fanout"] = False
+        self.assertEqual(self.skill.fanout_langs("en-us"), ["en-us"])
+
+    def test_first_good_answer_wins(self):
+        self.skill.fetch_answer = slow_answers({"pt-PT": PT}, {"en-us": 0.05})
+        start = time.monotonic()
+        results, lang = self.skill.fanout_lookup("pastel de nata", ["en-us", "pt-PT"], "metric")
+        self.assertEqual((results, lang), (PT, "pt-PT"))
+        # the empty english answer was not waited for
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(self.skill.get_metrics()["fanout"], {"pt-PT": 1})
+
+    def test_cached_first(self):
+        self.skill.answer_cache.put("pastel de nata", "pt-PT", "metric", PT)
+        self.skill.answer_cache.put("pastel de nata", "en-us", "metric", [])
+        self.skill.fetch_answer = Mock()
+        self.assertEqual(self.skill.fanout_lookup("pastel de nata", ["en-us", "pt-PT"], "metric"),
+                         (PT, "pt-PT"))
+        self.skill.fetch_answer.assert_not_called()
+
+    def test_no_answer(self):
+        self.skill.fetch_answer = slow_answers({}, {})
+        self.assertEqual(self.skill.fanout_lookup("asdfgh", ["en-us", "pt-PT"], "metric"),
+                         ([], "en-us"))
+        self.assertEqual(self.skill.fetch_answer.call_count, 2)
+
+    def test_budget(self):
+        self.skill.fetch_answer = slow_answers({"pt-PT": PT}, {"en-us": 0.3, "pt-PT": 0.3})
+        start = time.monotonic()
+        self.assertEqual(self.skill.fanout_lookup("pastel de nata", ["en-us", "pt-PT"], "metric",
+                                                  timeout=0.05), ([], "en-us"))
+        self.assertLess(time.monotonic() - start, 0.2)
+
+    def test_common_query_default_budget(self):
+        self.skill.settings.pop("cq_timeout", None)
+        self.skill.fetch_answer = slow_answers({"en-us": PT}, {"en-us": 0.05})
+        self.assertEqual(self.skill.match_common_query("pastel de nata", "en-us"),
+                         (PT[0]["summary"], 0.6))
+
+    def test_search(self):
+        self.skill.fetch_answer = slow_answers({"pt-PT": PT}, {})
+        self.skill.handle_search(Message("search_duck.intent", {"query": "pastel de nata"}))
+        spoken = [m["data"]["utterance"] for m in self.bus.emitted_msgs if m["type"] == "speak"]
+        self.assertEqual(spoken, [PT[0]["summary"]])
+        self.assertEqual(self.skill.session_results["default"]["lang"], "pt-PT")
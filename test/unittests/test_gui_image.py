@@ -0,0 +1,35 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+
+
+@patch("ovos_skill_ddg.can_use_gui", Mock(return_value=True))
+class TestGuiImage(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.duck.get_image = Mock(return_value="https://duckduckgo.com/i/ddg.jpeg")
+
+    def test_image_from_long_answer(self):
+        self.skill.duck.long_answer = Mock(return_value=[
+            {"title": "light", "summary": "answer 1", "img": "https://duckduckgo.com/i/light.jpg"},
+            {"title": "light", "summary": "answer 2", "img": "https://duckduckgo.com/i/light.jpg"}
+        ])
+        self.skill.handle_search(Message("search_duck.intent", {"query": "speed of light"}))
+        self.skill.handle_tell_more(Message("DuckMore"))
+        self.assertEqual(self.skill.gui["imgLink"], "https://duckduckgo.com/i/light.jpg")
+        self.assertEqual(self.skill.session_results["default"]["image"],
+                         "https://duckduckgo.com/i/light.jpg")
+        self.skill.duck.get_image.assert_not_called()
+
+    def test_image_fetched_once(self):
+        self.skill.duck.long_answer = Mock(return_value=[
+            {"title": "light", "summary": "answer 1"},
+            {"title": "light", "summary": "answer 2"}
+        ])
+        self.skill.handle_search(Message("search_duck.intent", {"query": "speed of light"}))
+        self.skill.handle_tell_more(Message("DuckMore"))
+        self.assertEqual(self.skill.gui["imgLink"], "https://duckduckgo.com/i/ddg.jpeg")
+        self.assertEqual(self.skill.duck.get_image.call_count, 1)
@@ -0,0 +1,107 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.images import ImageCache, Image
+
+URL = "https://duckduckgo.com/i/light.png"
+
+
+def fake_session(content: bytes) -> Mock:
+    session = Mock()
+    session.get.return_value.content = content
+    return session
+
+
+class TestImageCache(unittest.TestCase):
+    @unittest.skipIf(Image is None, "Pillow not installed")
+    def test_resized_once(self):
+        buf = io.BytesIO()
+        Image.new("RGBA", (1600, 1200), (255, 0, 0, 255)).save(buf, "PNG")
+        session = fake_session(buf.getvalue())
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(tmp, max_size=(400, 240), session=session)
+            path = cache.get(URL)
+            self.assertEqual(cache.get(URL), path)
+            self.assertEqual(session.get.call_count, 1)
+            with Image.open(path) as img:
+                self.assertEqual(img.format, "JPEG")
+                self.assertEqual(img.size, (320, 240))
+            self.assertEqual(cache.stats()["hits"], 1)
+
+    @patch("ovos_skill_ddg.images.Image", None)
+    def test_size_bound(self):
+        session = fake_session(b"x" * 400)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(tmp, max_bytes=1000, session=session)
+            first = cache.get("https://duckduckgo.com/i/1.png")
+            self.assertTrue(first.endswith(".png"))
+            os.utime(first, (0, 0))
+            cache.get("https://duckduckgo.com/i/2.png")
+            cache.get("https://duckduckgo.com/i/3.png")
+            self.assertFalse(os.path.exists(first))
+            self.assertEqual(len(os.listdir(tmp)), 2)
+            self.assertEqual(cache.stats()["bytes"], 800)
+            self.assertEqual(cache.stats()["evictions"], 1)
+            # byte count survives restarts
+            self.assertEqual(ImageCache(tmp, session=session).total_bytes, 800)
+
+    def test_download_failure(self):
+        session = Mock()
+        session.get.side_effect = ConnectionError
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(tmp, session=session)
+            self.assertIsNone(cache.get(URL))
+            self.assertEqual(os.listdir(tmp), [])
+            # not retried until failure_ttl passed
+            self.assertIsNone(cache.get(URL))
+            self.assertEqual(session.get.call_count, 1)
+            self.assertEqual(cache.stats()["failures"], 1)
+            cache._failed[URL] = 0
+            self.assertIsNone(cache.get(URL))
+            self.assertEqual(session.get.call_count, 2)
+
+    def test_local_path_skipped(self):
+        session = Mock()
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ImageCache(tmp, session=session)
+            self.assertIsNone(cache.get("/usr/lib/ovos_ddg_solver/logo.png"))
+            session.get.assert_not_called()
+
+
+@patch("ovos_skill_ddg.can_use_gui", Mock(return_value=True))
+class TestSkillImageCache(unittest.TestCase):
+    def test_gui_gets_local_path(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.duck.long_answer = Mock(return_value=[{"title": "light", "summary": "answer 1",
+                                                     "img": "/i/light.png"}])
+        skill.image_cache = Mock(get=Mock(return_value="/cache/images/light.jpg"),
+                                 cached=Mock(return_value=None))
+        skill.handle_search(Message("search_duck.intent", {"query": "speed of light"}))
+        # shown right away, cached in the background
+        self.assertEqual(skill.gui["imgLink"], "https://duckduckgo.com/i/light.png")
+        skill.background.shutdown(wait=True)
+        skill.image_cache.get.assert_called_once_with("https://duckduckgo.com/i/light.png")
+
+        skill.image_cache.cached.return_value = "/cache/images/light.jpg"
+        skill.handle_search(Message("search_duck.intent", {"query": "speed of light"}))
+        skill.image_cache.cached.assert_called_with("https://duckduckgo.com/i/light.png",
+                                                    touch=True)
+        self.assertEqual(skill.gui["imgLink"], "/cache/images/light.jpg")
+        self.assertEqual(skill.image_cache.get.call_count, 1)
+
+    def test_solver_logo_not_downloaded(self):
+        with tempfile.NamedTemporaryFile(suffix="logo.png") as logo:
+            skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+            skill.duck.long_answer = Mock(return_value=[{"title": "light", "summary": "answer 1",
+                                                         "img": logo.name}])
+            skill.image_cache = Mock(get=Mock(return_value=None),
+                                     cached=Mock(return_value=None))
+            skill.handle_search(Message("search_duck.intent", {"query": "speed of light"}))
+            skill.background.shutdown(wait=True)
+            skill.image_cache.get.assert_not_called()
+            self.assertEqual(skill.gui["imgLink"], logo.name)
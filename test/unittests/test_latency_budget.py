@@ -0,0 +1,36 @@
+import unittest
+from time import sleep
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+
+
+class TestLatencyBudget(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.settings["cq_timeout"] = 0.1
+
+        def slow_answer(query, lang=None, units=None):
+            sleep(0.3)
+            return [{"title": query, "summary": "the answer is always 42"}]
+
+        self.skill.duck.long_answer = Mock(side_effect=slow_answer)
+
+    def tearDown(self):
+        self.skill.settings.pop("cq_timeout")
+
+    def test_late_answer_fills_cache(self):
+        # deadline passes, skill drops out of the round
+        self.assertIsNone(self.skill.match_common_query("speed of light", "en-us"))
+        sleep(0.5)
+        # the late response answers the next asker
+        self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                         ("the answer is always 42", 0.6))
+        self.assertEqual(self.skill.duck.long_answer.call_count, 1)
+
+    def test_fast_answer_within_budget(self):
+        self.skill.settings["cq_timeout"] = 1
+        self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                         ("the answer is always 42", 0.6))
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+
+class TestLazySolver(unittest.TestCase):
+    def test_import_is_light(self):
+        code = "import sys, ovos_skill_ddg; print('ovos_ddg_solver' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "False")
+
+    def test_solver_built_on_first_use(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        self.assertIsNone(skill._duck)
+        self.assertIn("initialize", skill.get_metrics()["startup"])
+        self.assertIsInstance(skill.duck, PooledDuckDuckGoSolver)
+        self.assertIs(skill.duck, skill.load_solver())
+        self.assertIs(skill.duck.session, skill.http)
+        self.assertIs(skill.duck.breaker, skill.breaker)
+        self.assertIn("solver", skill.get_metrics()["startup"])
+
+    def test_prewarm(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill._stopping = Mock(wait=Mock(return_value=False))
+        skill.prewarm_solver()
+        self.assertIsInstance(skill._duck, PooledDuckDuckGoSolver)
+
+        # shutting down before the delay passed
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill._stopping.set()
+        skill.prewarm_solver()
+        self.assertIsNone(skill._duck)
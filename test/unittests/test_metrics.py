@@ -0,0 +1,79 @@
+import json
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.metrics import SkillMetrics
+
+
+class TestSkillMetrics(unittest.TestCase):
+    def test_percentiles(self):
+        metrics = SkillMetrics()
+        for ms in range(1, 101):
+            metrics.observe("fetch", "en-US", ms / 1000)
+        summary = metrics.snapshot()["fetch"]["en-us"]
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["sum"], 5.05)
+        self.assertEqual(summary["p50"], 0.051)
+        self.assertEqual(summary["p95"], 0.096)
+        self.assertEqual(summary["p99"], 0.1)
+
+    def test_window(self):
+        metrics = SkillMetrics(window=10)
+        for ms in range(100):
+            metrics.observe("fetch", "en-us", ms)
+        summary = metrics.snapshot()["fetch"]["en-us"]
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["p50"], 95)
+
+    def test_prometheus(self):
+        metrics = SkillMetrics()
+        with metrics.timer("cache", "en-us"):
+            pass
+        text = metrics.to_prometheus({"cache_hits": 3, "cache_persistent": False})
+        self.assertIn('ddg_stage_latency_seconds{stage="cache",lang="en-us",quantile="0.99"}', text)
+        self.assertIn('ddg_stage_latency_seconds_count{stage="cache",lang="en-us"} 1', text)
+        self.assertIn("ddg_cache_hits 3", text)
+        self.assertNotIn("persistent", text)
+
+
+class TestSkillInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.bus.emitted_msgs = []
+
+        def get_msg(msg):
+            self.bus.emitted_msgs.append(json.loads(msg))
+
+        self.bus.on("message", get_msg)
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.duck.long_answer = Mock(return_value=[
+            {"title": "ddg skill", "summary": "the answer is always 42"}
+        ])
+
+    def test_stages(self):
+        self.skill.match_common_query("what is the speed of light", "en-us")
+        self.skill.match_common_query("what is the speed of light", "en-us")
+        latency = self.skill.get_metrics()["latency"]
+        self.assertEqual(latency["match"]["en-us"]["count"], 2)
+        self.assertEqual(latency["cache"]["en-us"]["count"], 2)
+        self.assertEqual(latency["fetch"]["en-us"]["count"], 1)
+
+    def test_bus_and_textfile(self):
+        self.skill.match_common_query("what is the speed of light", "en-us")
+        self.skill.handle_metrics_request(Message("ovos.ddg.metrics.get"))
+        reply = self.bus.emitted_msgs[-1]
+        self.assertEqual(reply["type"], "ovos.ddg.metrics.get.response")
+        self.assertEqual(reply["data"]["cache"]["misses"], 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "ddg.prom")
+            self.skill.settings["metrics_file"] = path
+            self.skill.report_metrics()
+            self.skill.settings.pop("metrics_file")
+            with open(path) as f:
+                self.assertIn('stage="fetch"', f.read())
+        self.assertEqual(self.bus.emitted_msgs[-1]["type"], "ovos.ddg.metrics")
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.normalize import QueryNormalizer
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+
+class TestQueryNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = QueryNormalizer()
+
+    def test_rephrasings_collapse(self):
+        for query in ("What is the speed of light?", "what's the speed of light",
+                      "Um, can you tell me what is the speed of light, please?",
+                      "speed of light", "the speed  of light"):
+            self.assertEqual(self.normalizer.normalize(query, "en-us"), "speed of light", query)
+
+    def test_meaningful_words_kept(self):
+        self.assertEqual(self.normalizer.normalize("When was Stephen Hawking born?", "en-us"),
+                         "when was stephen hawking born")
+        self.assertEqual(self.normalizer.normalize("how many people live in Lisbon, Portugal", "en-us"),
+                         "how many people live in lisbon portugal")
+        self.assertEqual(self.normalizer.normalize("what is pi to 3.14 digits", "en-us"),
+                         "pi to 3.14 digits")
+        self.assertEqual(self.normalizer.normalize("The Who", "en-us"), "the who")
+        self.assertEqual(self.normalizer.normalize("who is the who", "en-us"), "the who")
+        self.assertEqual(self.normalizer.normalize("what is the moon", "en-us"), "the moon")
+        self.assertEqual(self.normalizer.normalize("who are you?", "en-us"), "who are you")
+        self.assertEqual(self.normalizer.normalize("what is it, please", "en-us"), "what is it")
+        self.assertEqual(self.normalizer.normalize("who is Isaac Newton", "en-us"),
+                         "isaac newton")
+        # never empty
+        self.assertEqual(self.normalizer.normalize("what is?", "en-us"), "what is")
+
+    def test_fillers_need_a_prefix(self):
+        for query in ("hey jude", "please please me", "so what", "ok computer"):
+            self.assertEqual(self.normalizer.normalize(query, "en-us"), query)
+        self.assertEqual(self.normalizer.normalize("hey, tell me about jude", "en-us"), "jude")
+
+    def test_infobox_prefix_kept(self):
+        solver = PooledDuckDuckGoSolver()
+        normalizer = QueryNormalizer(
+            intent_matcher=lambda q, lang: solver.match_infobox_intent(q, lang)[0])
+        for query in ("what is isaac newton known for", "what is the eiffel tower famous for",
+                      "what is albert einstein alma mater", "what is nasa official website",
+                      "what is albert einstein field of expertise",
+                      "what is albert einstein thesis subject"):
+            normalized = normalizer.normalize(query, "en-us")
+            self.assertEqual(solver.match_infobox_intent(normalized, "en")[0],
+                             solver.match_infobox_intent(query, "en")[0], query)
+            self.assertIsNotNone(solver.match_infobox_intent(normalized, "en")[0], query)
+        self.assertEqual(normalizer.normalize("What is the speed of light?", "en-us"),
+                         "speed of light")
+
+    def test_languages(self):
+        self.assertEqual(self.normalizer.normalize("O que é a velocidade da luz?", "pt-PT"),
+                         "velocidade da luz")
+        self.assertEqual(self.normalizer.normalize("¿Qué es la luz?", "es-es"), "la luz")
+        self.assertEqual(self.normalizer.normalize("Quem é ele?", "pt-PT"), "quem é ele")
+        self.assertEqual(self.normalizer.normalize("Qu'est-ce que la photosynthèse ?", "fr-fr"),
+                         "la photosynthèse")
+        self.assertEqual(self.normalizer.normalize("Was ist die Lichtgeschwindigkeit?", "de-de"),
+                         "die lichtgeschwindigkeit")
+        # unknown languages only get the generic steps
+        self.assertEqual(self.normalizer.normalize("Wat is de Maan?", "nl-nl"), "wat is de maan")
+
+
+class TestSkillNormalization(unittest.TestCase):
+    def setUp(self):
+        self.skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        self.skill.duck.long_answer = Mock(return_value=[{"title": "light", "summary": "42"}])
+
+    def test_one_upstream_request(self):
+        for phrase in ("What is the speed of light?", "what's the speed of light",
+                       "speed of light"):
+            self.assertEqual(self.skill.match_common_query(phrase, "en-us"), ("42", 0.6))
+        self.skill.duck.long_answer.assert_called_once_with("speed of light",
+                                                            lang="en-us", units="metric")
+
+    def test_batch_rephrasings(self):
+        answers = self.skill.batch_query(["What is the speed of light?", "speed of light"],
+                                         "en-us", "metric")
+        self.assertEqual([a["query"] for a in answers],
+                         ["What is the speed of light?", "speed of light"])
+        self.assertEqual(self.skill.duck.long_answer.call_count, 1)
+
+    def test_disabled(self):
+        self.skill.settings["normalize_queries"] = False
+        try:
+            self.skill.match_common_query("What is the speed of light?", "en-us")
+        finally:
+            self.skill.settings.pop("normalize_queries", None)
+        self.skill.duck.long_answer.assert_called_once_with("What is the speed of light?",
+                                                            lang="en-us", units="metric")
+
+    def test_normalized_once(self):
+        self.skill.infobox_intent = Mock(return_value=None)
+        self.skill.normalizer.intent_matcher = self.skill.infobox_intent
+        for _ in range(3):
+            self.assertEqual(self.skill.normalize_query("What is the speed of light?", "en-us"),
+                             "speed of light")
+        self.assertEqual(self.skill.infobox_intent.call_count, 2)
@@ -0,0 +1,50 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+
+
+@patch("ovos_skill_ddg.can_use_gui", Mock(return_value=False))
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.bus.emitted_msgs = []
+
+        def get_msg(msg):
+            self.bus.emitted_msgs.append(json.loads(msg))
+
+        self.bus.on("message", get_msg)
+
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.settings["prefetch_followups"] = True
+        self.skill.duck.long_answer = Mock(return_value=[
+            {"title": "newton", "summary": "Isaac Newton was an English polymath."}
+        ])
+        self.skill.duck.extract_and_search = Mock(return_value={"RelatedTopics": [
+            {"Text": "Isaac Newton was an English polymath."},
+            {"Text": "Newton's laws of motion", "Icon": {"URL": "/i/laws.png"}},
+            {"Name": "See also", "Topics": []}
+        ]})
+
+    def tearDown(self):
+        self.skill.settings.pop("prefetch_followups")
+
+    def test_followup_from_memory(self):
+        self.skill.handle_search(Message("search_duck.intent", {"query": "isaac newton"}))
+        self.skill.session_results["default"]["prefetch"].result(timeout=1)
+
+        self.skill.handle_tell_more(Message("DuckMore"))
+        spoken = [m["data"]["utterance"] for m in self.bus.emitted_msgs
+                  if m["type"] == "speak"]
+        self.assertEqual(spoken[-1], "Newton's laws of motion")
+        self.assertEqual(self.skill.session_results["default"]["results"][-1]["img"],
+                         "https://duckduckgo.com/i/laws.png")
+        self.assertEqual(self.skill.duck.extract_and_search.call_count, 1)
+
+    def test_disabled(self):
+        self.skill.settings["prefetch_followups"] = False
+        self.skill.handle_search(Message("search_duck.intent", {"query": "isaac newton"}))
+        self.assertNotIn("prefetch", self.skill.session_results["default"])
+        self.skill.duck.extract_and_search.assert_not_called()
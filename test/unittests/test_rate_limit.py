@@ -0,0 +1,134 @@
+import time
+import unittest
+from threading import Thread
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.breaker import UpstreamError
+from ovos_skill_ddg.ratelimit import BACKGROUND, INTERACTIVE, RateLimitedError, \
+    RateLimiter, current_priority, request_priority
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(rate=20, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - start, 0.03)
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        stats = limiter.stats()
+        self.assertEqual(stats["interactive_wait_count"], 4)
+        self.assertEqual(stats["interactive_queued"], 0)
+
+    def test_interactive_first(self):
+        limiter = RateLimiter(rate=10, burst=1)
+        limiter.acquire()
+        order = []
+
+        def _acquire(name, priority):
+            limiter.acquire(priority)
+            order.append(name)
+
+        threads = [Thread(target=_acquire, args=(f"bg{i}", BACKGROUND)) for i in range(2)]
+        for t in threads:
+            t.start()
+        time.sleep(0.02)
+        self.assertEqual(limiter.stats()["background_queued"], 2)
+        threads.append(Thread(target=_acquire, args=("live", INTERACTIVE)))
+        threads[-1].start()
+        for t in threads:
+            t.join(2)
+        self.assertEqual(order[0], "live")
+        self.assertEqual(sorted(order[1:]), ["bg0", "bg1"])
+        self.assertEqual(limiter.stats()["background_max_queued"], 2)
+
+    def test_max_wait(self):
+        limiter = RateLimiter(rate=1, burst=1, max_wait=0.05)
+        limiter.acquire()
+        with self.assertRaises(RateLimitedError):
+            limiter.acquire()
+        self.assertTrue(issubclass(RateLimitedError, UpstreamError))
+        self.assertEqual(limiter.stats()["interactive_timeouts"], 1)
+        self.assertEqual(limiter.stats()["interactive_queued"], 0)
+
+    def test_request_priority(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        limiter = RateLimiter(rate=100, burst=5)
+        with request_priority(BACKGROUND):
+            self.assertEqual(current_priority(), BACKGROUND)
+            limiter.acquire()
+        self.assertEqual(current_priority(), INTERACTIVE)
+        self.assertEqual(limiter.stats()["background_wait_count"], 1)
+
+    def test_solver_requests_throttled(self):
+        session = Mock()
+        session.get.return_value.json.return_value = {"AbstractText": "fast"}
+        limiter = RateLimiter(rate=100, burst=5)
+        solver = PooledDuckDuckGoSolver(session=session, limiter=limiter)
+        solver.get_data("speed of light", lang="en-us")
+        with solver.request_scope():
+            solver.get_data("speed of sound", lang="en-us")
+            # memoized, no second slot
+            solver.get_data("speed of sound", lang="en-us")
+        self.assertEqual(limiter.stats()["interactive_wait_count"], 2)
+
+
+class TestSkillRateLimit(unittest.TestCase):
+    def setUp(self):
+        self.skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        self.skill.settings["rate_limit"] = 2
+        self.skill.on_settings_changed()
+
+    def tearDown(self):
+        self.skill.settings.pop("rate_limit", None)
+        self.skill.shutdown()
+
+    def test_off_by_default(self):
+        self.skill.settings.pop("rate_limit")
+        self.skill.on_settings_changed()
+        self.assertIsNone(self.skill.limiter)
+
+    def test_metrics(self):
+        self.assertIsNotNone(self.skill.limiter)
+        self.assertEqual(self.skill.get_metrics()["ratelimit"]["background_queued"], 0)
+
+    def test_background_revalidate(self):
+        priorities = []
+        self.skill.fetch_answer = Mock(side_effect=lambda *a: priorities.append(current_priority()))
+        self.skill.revalidate("speed of light", "en-us", "metric")
+        self.skill.background.shutdown(wait=True)
+        self.assertEqual(priorities, [BACKGROUND])
+
+    def test_background_does_not_block_lookups(self):
+        self.skill.settings.update({"rate_limit": 4, "rate_limit_burst": 1,
+                                    "rate_limit_max_wait": 2, "cq_timeout": 1})
+        self.skill.on_settings_changed()
+        self.skill.limiter.acquire()
+
+        def _fetch(query, lang, units):
+            self.skill.limiter.acquire()
+            return [{"title": query, "summary": query}]
+
+        self.skill.fetch_answer = Mock(side_effect=_fetch)
+        try:
+            for i in range(4):
+                self.skill.revalidate(f"query {i}", "en-us", "metric")
+            time.sleep(0.05)
+            self.assertEqual(self.skill.limiter.stats()["background_queued"], 2)
+            # the interactive lookup is first in line for the next slot
+            self.assertEqual(self.skill.match_common_query("speed of light", "en-us"),
+                             ("speed of light", 0.6))
+        finally:
+            self.skill.settings.pop("cq_timeout", None)
+            self.skill.settings.pop("rate_limit_burst", None)
+            self.skill.settings.pop("rate_limit_max_wait", None)
+
+    def test_disabled(self):
+        self.skill.settings["rate_limit"] = 0
+        self.skill.on_settings_changed()
+        self.assertIsNone(self.skill.limiter)
+        self.assertEqual(self.skill.get_metrics()["ratelimit"], {})
@@ -0,0 +1,45 @@
+import sys
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.results import Result, compact_results
+
+ANSWER = {"title": "who is isaac newton",
+          "summary": "Sir Isaac Newton was an English polymath.",
+          "img": "https://duckduckgo.com/i/401ff0bf4dfa0847.jpg"}
+
+
+class TestResult(unittest.TestCase):
+    def test_compact(self):
+        result = Result.from_dict(ANSWER)
+        self.assertLess(sys.getsizeof(result), sys.getsizeof(dict(ANSWER)))
+        self.assertFalse(hasattr(result, "__dict__"))
+        self.assertEqual(result.to_dict(), {"summary": ANSWER["summary"], "img": ANSWER["img"]})
+
+    def test_interned_image(self):
+        results = compact_results([dict(ANSWER), {"summary": "2", "img": "".join(ANSWER["img"])}])
+        self.assertIs(results[0].img, results[1].img)
+        self.assertIsNone(Result("no image").img)
+
+    def test_item_access(self):
+        result = Result.from_dict(ANSWER)
+        self.assertEqual(result["summary"], ANSWER["summary"])
+        self.assertEqual(result.get("img"), ANSWER["img"])
+        self.assertIsNone(result.get("title"))
+        with self.assertRaises(KeyError):
+            result["title"]
+
+
+class TestSkillResults(unittest.TestCase):
+    def test_session_keeps_records(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.duck.long_answer = Mock(return_value=[ANSWER, dict(ANSWER, summary="He was a key figure.")])
+        skill.display_ddg = Mock()
+        skill.speak = Mock()
+        skill.handle_search(Message("search_duck.intent", {"query": "who is isaac newton"}))
+        results = skill.session_results["default"]["results"]
+        self.assertTrue(all(isinstance(r, Result) for r in results))
+        skill.handle_tell_more(Message("DuckMore"))
+        self.assertEqual(skill.speak.call_args[0][0], "He was a key figure.")
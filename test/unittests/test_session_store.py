@@ -0,0 +1,45 @@
+import unittest
+from unittest.mock import patch
+
+from ovos_skill_ddg.sessions import SessionStore
+
+
+class TestSessionStore(unittest.TestCase):
+    def test_dict_like(self):
+        store = SessionStore()
+        store["default"] = {"query": "speed of light", "idx": 0}
+        self.assertIn("default", store)
+        store["default"]["idx"] += 1
+        self.assertEqual(store["default"]["idx"], 1)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.pop("default")["query"], "speed of light")
+        self.assertNotIn("default", store)
+        self.assertIsNone(store.pop("default"))
+        with self.assertRaises(KeyError):
+            store["default"]
+
+    def test_lru_eviction(self):
+        store = SessionStore(max_sessions=2)
+        store["a"] = {}
+        store["b"] = {}
+        store["a"]  # touch, "b" is now the least recently used
+        store["c"] = {}
+        self.assertEqual(set(store), {"a", "c"})
+        self.assertEqual(store.stats()["lru_evictions"], 1)
+        self.assertEqual(store.stats()["size"], 2)
+
+    def test_ttl_eviction(self):
+        store = SessionStore(ttl=10)
+        with patch("ovos_skill_ddg.sessions.time.monotonic") as now:
+            now.return_value = 100
+            store["a"] = {}
+            store["b"] = {}
+            now.return_value = 105
+            store["b"]
+            now.return_value = 111
+            self.assertNotIn("a", store)
+            self.assertIn("b", store)
+            now.return_value = 200
+            store["c"] = {}
+        self.assertEqual(list(store), ["c"])
+        self.assertEqual(store.stats()["ttl_evictions"], 2)
@@ -0,0 +1,129 @@
+import tempfile
+import time
+import unittest
+from os.path import join
+from threading import Event, Thread
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.backends import CacheBackend, SocketBackend, SqliteBackend, make_backend
+from ovos_skill_ddg.cache import AnswerCache
+from ovos_skill_ddg.cache_server import CacheServer
+
+RESULTS = [{"title": "speed of light", "summary": "299 792 458 m/s"}]
+
+
+class TestSharedCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sqlite_shared_between_processes(self):
+        path = join(self.tmp.name, "answers.db")
+        node1 = AnswerCache(backend=SqliteBackend(path))
+        node2 = AnswerCache(backend=SqliteBackend(path))
+        node1.put("speed of light", "en-us", "metric", RESULTS)
+        self.assertEqual(node2.get("speed of light", "en-us", "metric"), RESULTS)
+        node1.close()
+        node2.close()
+
+    def test_cache_server(self):
+        sock = join(self.tmp.name, "ddg.sock")
+        with CacheServer(sock) as server:
+            node1 = AnswerCache(backend=make_backend(f"unix:{sock}"))
+            node2 = AnswerCache(backend=make_backend(f"unix:{sock}"))
+            self.assertIsNone(node2.get("speed of light", "en-us", "metric"))
+            node1.put("speed of light", "en-us", "metric", RESULTS)
+            self.assertEqual(node2.get("speed of light", "en-us", "metric"), RESULTS)
+            self.assertEqual(node2.backend.stats()["hits"], 1)
+            self.assertEqual(server.store.handle({"op": "stats"})["stats"]["size"], 1)
+            node1.close()
+            node2.close()
+
+    def test_tcp(self):
+        with CacheServer(("127.0.0.1", 0)) as server:
+            host, port = server.address
+            cache = AnswerCache(backend=make_backend(f"tcp:{host}:{port}"))
+            cache.put("speed of light", "en-us", "metric", RESULTS)
+            self.assertEqual(AnswerCache(backend=make_backend(f"tcp:{host}:{port}"))
+                             .get("speed of light", "en-us", "metric"), RESULTS)
+
+    def test_token(self):
+        with CacheServer(("127.0.0.1", 0), token="secret") as server:
+            host, port = server.address
+            cache = AnswerCache(backend=make_backend(f"tcp:{host}:{port}", token="secret"))
+            cache.put("speed of light", "en-us", "metric", RESULTS)
+            self.assertEqual(server.store.handle({"op": "stats"})["stats"]["size"], 1)
+            intruder = AnswerCache(backend=make_backend(f"tcp:{host}:{port}"))
+            intruder.put("speed of light", "en-us", "metric", [{"summary": "fake"}])
+            self.assertEqual(intruder.stats()["backend_errors"], 1)
+            self.assertEqual(server.store.handle({"op": "get", "key": cache.make_key(
+                "speed of light", "en-us", "metric")})["entry"][1], RESULTS)
+
+    def test_fallback_to_memory(self):
+        cache = AnswerCache(backend=SocketBackend(join(self.tmp.name, "missing.sock")))
+        self.assertIsNone(cache.get("speed of light", "en-us", "metric"))
+        cache.put("speed of light", "en-us", "metric", RESULTS)
+        self.assertEqual(cache.get("speed of light", "en-us", "metric"), RESULTS)
+        # not retried until backend_retry passed
+        self.assertEqual(cache.stats()["backend_errors"], 1)
+
+    def test_slow_backend_does_not_block_memory(self):
+        release = Event()
+
+        class SlowBackend(CacheBackend):
+            def get(self, key):
+                release.wait(2)
+
+            def put(self, key, expires, results):
+                pass
+
+        cache = AnswerCache(backend=SlowBackend())
+        cache.put("speed of light", "en-us", "metric", RESULTS)
+        miss = Thread(target=cache.get, args=("speed of sound", "en-us", "metric"))
+        miss.start()
+        try:
+            start = time.monotonic()
+            self.assertEqual(cache.get("speed of light", "en-us", "metric"), RESULTS)
+            self.assertLess(time.monotonic() - start, 0.5)
+        finally:
+            release.set()
+            miss.join()
+
+    def test_server_goes_away(self):
+        sock = join(self.tmp.name, "ddg.sock")
+        server = CacheServer(sock).start()
+        cache = AnswerCache(backend=make_backend(f"unix:{sock}"), backend_retry=0)
+        cache.put("a", "en-us", "metric", RESULTS)
+        server.stop()
+        cache.put("b", "en-us", "metric", RESULTS)
+        self.assertEqual(cache.get("b", "en-us", "metric"), RESULTS)
+        self.assertGreaterEqual(cache.stats()["backend_errors"], 1)
+
+        # reconnects once it is back
+        server = CacheServer(sock).start()
+        try:
+            cache.put("c", "en-us", "metric", RESULTS)
+            self.assertEqual(server.store.handle({"op": "stats"})["stats"]["size"], 1)
+        finally:
+            server.stop()
+
+    def test_make_backend(self):
+        self.assertIsInstance(make_backend(f"sqlite:{self.tmp.name}/answers.db"), SqliteBackend)
+        self.assertEqual(make_backend("tcp:cache:7733").address, ("cache", 7733))
+        self.assertEqual(make_backend("tcp::7733").address, ("127.0.0.1", 7733))
+        with self.assertRaises(ValueError):
+            make_backend("redis://localhost")
+
+    def test_skill_setting(self):
+        sock = join(self.tmp.name, "ddg.sock")
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.settings["cache_backend"] = f"unix:{sock}"
+        try:
+            self.assertIsInstance(skill._make_cache_backend(), SocketBackend)
+            skill.settings["cache_backend"] = "bogus"
+            self.assertIsNone(skill._make_cache_backend())
+        finally:
+            skill.settings.pop("cache_backend", None)
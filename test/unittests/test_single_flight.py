@@ -0,0 +1,51 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import sleep
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.lookup import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_shared(self):
+        flight = SingleFlight()
+        release = Event()
+        func = Mock(side_effect=lambda: release.wait() and 42)
+
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(flight.do, "key", func) for _ in range(4)]
+            sleep(0.1)
+            self.assertEqual(flight.in_flight(), 1)
+            release.set()
+            self.assertEqual([f.result() for f in futures], [42] * 4)
+
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(flight.shared, 3)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_exception_shared(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("key", Mock(side_effect=ValueError))
+        # key released after failure
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+
+class TestSkillCoalescing(unittest.TestCase):
+    def test_identical_lookups(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+
+        def slow_answer(query, lang=None, units=None):
+            sleep(0.2)
+            return [{"title": query, "summary": "the answer is always 42"}]
+
+        skill.duck.long_answer = Mock(side_effect=slow_answer)
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(skill.fetch_answer, "speed of light", "en-us", "metric")
+                       for _ in range(4)]
+            for f in futures:
+                self.assertEqual(f.result()[0]["summary"], "the answer is always 42")
+        self.assertEqual(skill.duck.long_answer.call_count, 1)
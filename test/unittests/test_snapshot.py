@@ -0,0 +1,191 @@
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+import unittest
+from os.path import join
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.cache import AnswerCache
+from ovos_skill_ddg.images import ImageCache
+from ovos_skill_ddg.snapshot import SnapshotError, export_snapshot, import_snapshot, \
+    main, read_manifest
+
+IMG = "https://duckduckgo.com/i/newton.jpg"
+RESULTS = [{"title": "isaac newton", "summary": "Isaac Newton was an English polymath.",
+            "img": IMG}]
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = join(self.tmp.name, "snapshot.tar.gz")
+        self.answers = AnswerCache(ttl=3600)
+        self.answers.put("isaac newton", "en-us", "metric", RESULTS)
+        self.answers.put("speed of light", "en-us", "metric",
+                         [{"summary": "299 792 458 m/s"}], ttl=-1)  # expired
+        self.answers.put("asdfgh", "en-us", "metric", [])  # known miss
+        self.images = ImageCache(join(self.tmp.name, "images"))
+        self.images.put(IMG, b"jpeg data")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        manifest = export_snapshot(self.path, self.answers, self.images)
+        self.assertEqual((manifest["answers"], manifest["images"]), (1, 1))
+        self.assertEqual(read_manifest(self.path)["version"], 1)
+
+        answers = AnswerCache()
+        images = ImageCache(join(self.tmp.name, "device"))
+        stats = import_snapshot(self.path, answers, images)
+        self.assertEqual((stats["answers"], stats["images"]), (1, 1))
+        self.assertEqual(answers.get("isaac newton", "en-us", "metric"), RESULTS)
+        self.assertIsNone(answers.get("speed of light", "en-us", "metric"))
+        with open(images.cached(IMG), "rb") as f:
+            self.assertEqual(f.read(), b"jpeg data")
+
+        # nothing new when loaded again
+        stats = import_snapshot(self.path, answers, images, imported_at=stats["imported_at"])
+        self.assertEqual((stats["answers"], stats["images"]), (0, 0))
+
+    def test_lifetime_from_import(self):
+        export_snapshot(self.path, self.answers)
+        answers = AnswerCache()
+        import_snapshot(self.path, answers, imported_at=time.time() - 7200)
+        self.assertIsNone(answers.get("isaac newton", "en-us", "metric"))
+
+    def test_newer_answer_kept(self):
+        export_snapshot(self.path, self.answers)
+        answers = AnswerCache(ttl=86400)
+        newer = [{"summary": "Sir Isaac Newton was an English polymath."}]
+        answers.put("isaac newton", "en-us", "metric", newer)
+        self.assertEqual(import_snapshot(self.path, answers)["answers"], 0)
+        self.assertEqual(answers.get("isaac newton", "en-us", "metric"), newer)
+
+    def test_rejects_unknown(self):
+        manifest = json.dumps({"format": "ovos-skill-ddg-cache", "version": 99}).encode()
+        with tarfile.open(self.path, "w:gz") as tar:
+            info = tarfile.TarInfo("manifest.json")
+            info.size = len(manifest)
+            tar.addfile(info, io.BytesIO(manifest))
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path, AnswerCache())
+        with open(self.path, "w") as f:
+            f.write("not a snapshot")
+        with self.assertRaises(SnapshotError):
+            read_manifest(self.path)
+
+    def _write(self, answers: bytes):
+        manifest = json.dumps({"format": "ovos-skill-ddg-cache", "version": 1,
+                               "created": time.time()}).encode()
+        with tarfile.open(self.path, "w:gz") as tar:
+            for name, data in (("manifest.json", manifest), ("answers.jsonl", answers),
+                               ("images.json", b"{}")):
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+    def test_broken(self):
+        self._write(b"not json\n")
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path, AnswerCache())
+        export_snapshot(self.path, self.answers)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[:len(data) // 2])
+        with self.assertRaises(SnapshotError):
+            read_manifest(self.path)
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.path, AnswerCache())
+
+    def test_malformed_answers_skipped(self):
+        lines = [{"key": "a|en-us|metric", "ttl": 60, "results": [{"title": "no summary"}]},
+                 {"key": "b|en-us|metric", "ttl": 60, "results": "text"},
+                 {"key": "c|en-us|metric", "ttl": 60, "results": [{"summary": "ok"}]},
+                 ["not", "an", "entry"]]
+        self._write(b"".join(json.dumps(line).encode() + b"\n" for line in lines))
+        answers = AnswerCache()
+        self.assertEqual(import_snapshot(self.path, answers)["answers"], 1)
+        self.assertEqual(answers.get("c", "en-us", "metric"), [{"summary": "ok"}])
+        self.assertIsNone(answers.get("a", "en-us", "metric"))
+
+    def test_cli(self):
+        source, device = join(self.tmp.name, "source"), join(self.tmp.name, "device")
+        cache = AnswerCache(path=join(source, "answers.db"))
+        cache.put("isaac newton", "en-us", "metric", RESULTS)
+        cache.close()
+        with patch("builtins.print"):
+            main(["export", self.path, "--cache-dir", source])
+            main(["import", self.path, "--cache-dir", device])
+        cache = AnswerCache(path=join(device, "answers.db"))
+        self.assertEqual(cache.get("isaac newton", "en-us", "metric"), RESULTS)
+        cache.close()
+
+
+class TestSkillSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = join(self.tmp.name, "snapshot.tar.gz")
+        self.bus = FakeBus()
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.settings["snapshot_dirs"] = [self.tmp.name]
+        self.skill.answer_cache.put("isaac newton", "en-us", "metric", RESULTS)
+
+    def tearDown(self):
+        self.skill.settings.pop("snapshot_dirs", None)
+        self.skill.answer_cache.clear()
+        self.tmp.cleanup()
+
+    def test_bus_export_import(self):
+        replies = []
+        self.bus.on("ovos.ddg.cache.export.response", lambda m: replies.append(m.data))
+        self.bus.on("ovos.ddg.cache.import.response", lambda m: replies.append(m.data))
+        self.bus.emit(Message("ovos.ddg.cache.export", {"path": self.path}))
+        self.assertEqual(replies[-1]["answers"], 1)
+        self.assertEqual(replies[-1]["path"], self.path)
+
+        self.skill.answer_cache.clear()
+        self.bus.emit(Message("ovos.ddg.cache.import", {"path": self.path}))
+        self.assertEqual(replies[-1]["answers"], 1)
+        self.assertEqual(self.skill.answer_cache.get("isaac newton", "en-us", "metric"), RESULTS)
+
+        self.bus.emit(Message("ovos.ddg.cache.import", {"path": join(self.tmp.name, "missing")}))
+        self.assertIn("error", replies[-1])
+
+        with open(self.path, "wb") as f:
+            f.write(b"\x1f\x8b truncated")
+        self.bus.emit(Message("ovos.ddg.cache.import", {"path": self.path}))
+        self.assertIn("error", replies[-1])
+
+    def test_lifetime_from_first_import(self):
+        export_snapshot(self.path, self.skill.answer_cache)
+        with patch.object(DuckDuckGoSkill, "cache_dir", self.tmp.name):
+            first = self.skill.import_cache_snapshot(self.path)
+            # a reboot loading the same snapshot again
+            with patch("ovos_skill_ddg.snapshot.time.time", Mock(return_value=time.time() + 60)):
+                again = self.skill.import_cache_snapshot(self.path)
+        self.assertEqual(again["imported_at"], first["imported_at"])
+
+    def test_bus_paths_restricted(self):
+        replies = []
+        self.bus.on("ovos.ddg.cache.export.response", lambda m: replies.append(m.data))
+        self.bus.on("ovos.ddg.cache.import.response", lambda m: replies.append(m.data))
+        victim = join(tempfile.gettempdir(), "ddg-victim.txt")
+        self.skill.settings["snapshot_dirs"] = []
+        with patch.object(DuckDuckGoSkill, "cache_dir", self.tmp.name):
+            for path in (victim, join(self.tmp.name, "..", "ddg-victim.txt")):
+                self.bus.emit(Message("ovos.ddg.cache.export", {"path": path}))
+                self.assertEqual(replies[-1], {"error": "path not allowed"})
+                self.bus.emit(Message("ovos.ddg.cache.import", {"path": path}))
+                self.assertEqual(replies[-1], {"error": "path not allowed"})
+            # relative to the cache dir
+            self.bus.emit(Message("ovos.ddg.cache.export", {"path": "top.tar.gz"}))
+            self.assertEqual(replies[-1]["path"], join(os.path.realpath(self.tmp.name),
+                                                       "top.tar.gz"))
+        self.assertFalse(os.path.exists(victim))
@@ -0,0 +1,80 @@
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from ovos_utils.messagebus import FakeBus, Message
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.solver import PooledDuckDuckGoSolver
+
+ABSTRACT = ("Isaac Newton was an English polymath. He was a key figure in the "
+            "Scientific Revolution. Newton also made seminal contributions to optics.")
+RESPONSE = {"Heading": "Isaac Newton", "AbstractText": ABSTRACT, "Image": "/i/newton.jpg",
+            "Infobox": {"content": [{"label": "Born", "value": "25 December 1642"}]},
+            "RelatedTopics": []}
+
+
+def make_solver():
+    session = Mock()
+    session.get.return_value.json.return_value = RESPONSE
+    return PooledDuckDuckGoSolver(session=session)
+
+
+class TestStreamAnswer(unittest.TestCase):
+    def test_same_steps_as_long_answer(self):
+        solver = make_solver()
+        for query in ("isaac newton", "when was isaac newton born"):
+            self.assertEqual(list(solver.stream_answer(query, lang="en-us")),
+                             solver.long_answer(query, lang="en-us"))
+
+    def test_first_sentence_first(self):
+        solver = make_solver()
+        steps = solver.stream_answer("isaac newton", lang="en-us")
+        first = next(steps)
+        self.assertEqual(first["summary"], "Isaac Newton was an English polymath.")
+        self.assertEqual(first["img"], "https://duckduckgo.com/i/newton.jpg")
+        self.assertEqual(len(list(steps)), 2)
+        # one API request for the whole answer
+        self.assertEqual(solver.session.get.call_count, 1)
+
+
+@patch("ovos_skill_ddg.can_use_gui", Mock(return_value=False))
+class TestSkillStreaming(unittest.TestCase):
+    def setUp(self):
+        self.bus = FakeBus()
+        self.bus.emitted_msgs = []
+        self.bus.on("message", lambda msg: self.bus.emitted_msgs.append(json.loads(msg)))
+        self.skill = DuckDuckGoSkill(bus=self.bus, skill_id="ddg.test")
+        self.skill.settings["stream_answers"] = True
+        self.skill.duck = make_solver()
+
+    def tearDown(self):
+        self.skill.settings.pop("stream_answers", None)
+        self.skill.answer_cache.clear()
+
+    def spoken(self):
+        return [m["data"]["utterance"] for m in self.bus.emitted_msgs if m["type"] == "speak"]
+
+    def test_spoken_before_cached(self):
+        put = self.skill.answer_cache.put
+
+        def _put(*args):
+            # the first sentence is out before the answer is stored
+            self.assertEqual(self.spoken(), ["Isaac Newton was an English polymath."])
+            put(*args)
+
+        with patch.object(self.skill.answer_cache, "put", side_effect=_put) as cache_put:
+            self.skill.handle_search(Message("search_duck.intent", {"query": "isaac newton"}))
+        cache_put.assert_called_once()
+        self.assertEqual(self.spoken(), ["Isaac Newton was an English polymath."])
+        self.assertEqual(len(self.skill.session_results["default"]["results"]), 3)
+        self.assertIn("first_sentence", self.skill.metrics.snapshot())
+
+        self.skill.handle_tell_more(Message("DuckMore"))
+        self.assertEqual(self.spoken()[-1], "He was a key figure in the Scientific Revolution.")
+
+    def test_cached_not_streamed(self):
+        self.skill.handle_search(Message("search_duck.intent", {"query": "isaac newton"}))
+        self.skill.duck.stream_answer = Mock()
+        self.skill.handle_search(Message("search_duck.intent", {"query": "isaac newton"}))
+        self.skill.duck.stream_answer.assert_not_called()
+        self.assertEqual(self.spoken(), ["Isaac Newton was an English polymath."] * 2)
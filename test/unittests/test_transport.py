@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.solver import InProcessIntentContainer, PooledDuckDuckGoSolver
+from ovos_skill_ddg.transport import make_http_session
+
+
+class TestTransport(unittest.TestCase):
+    def test_http_session(self):
+        session = make_http_session(pool_size=4, retries=3, backoff=0.5)
+        adapter = session.get_adapter("https://api.duckduckgo.com")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.5)
+
+    def test_solver_uses_session(self):
+        session = Mock()
+        session.get.return_value.json.return_value = {"AbstractText": "42"}
+        solver = PooledDuckDuckGoSolver(session=session, timeout=(1, 2))
+        self.assertEqual(solver.get_data("speed of light", lang="en-US"),
+                         {"AbstractText": "42"})
+        session.get.assert_called_once_with("https://api.duckduckgo.com",
+                                            params={"format": "json",
+                                                    "kl": "us-en",
+                                                    "q": "speed of light"},
+                                            timeout=(1, 2))
+
+        session.get.side_effect = ConnectionError
+        self.assertEqual(solver.get_data("speed of light", lang="en-US"), {})
+
+    def test_infobox_intents_in_process(self):
+        solver = PooledDuckDuckGoSolver(session=Mock())
+        self.assertIsInstance(solver.intent_matchers["en"], InProcessIntentContainer)
+        intent, kw = solver.match_infobox_intent("when was stephen hawking born", "en-us")
+        self.assertEqual(intent, "born")
+        self.assertEqual(kw, "stephen hawking")
+
+    def test_skill_settings(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        self.assertIsInstance(skill.duck, PooledDuckDuckGoSolver)
+        skill.settings["http_read_timeout"] = 20
+        skill.on_settings_changed()
+        self.assertEqual(skill.duck.timeout, (3.05, 20))
+        skill.settings.pop("http_read_timeout")
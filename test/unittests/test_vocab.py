@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.vocab import VocabMatcher
+
+VOCAB = {("MiscBlacklist", "en-us"): ["joke", "play music"],
+         ("Weather", "en-us"): ["weather", "rain", "forecast"],
+         ("Weather", "pt-pt"): ["chuva", "previsão"]}
+
+
+def loader(voc, lang):
+    return VOCAB.get((voc, lang), [])
+
+
+class TestVocabMatcher(unittest.TestCase):
+    def test_same_as_voc_match(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.voc_list = Mock(side_effect=loader)
+        matcher = VocabMatcher(loader, ("MiscBlacklist", "Weather"))
+        for phrase in ("will it rain tomorrow", "tell me a joke", "Play music!",
+                       "what is the forecast?", "speed of light", "brain surgery",
+                       "jokes about ducks", ""):
+            expected = any(skill.voc_match(phrase, voc, lang="en-us")
+                           for voc in ("MiscBlacklist", "Weather"))
+            self.assertEqual(matcher.match(phrase, "en-us"), expected, phrase)
+
+    def test_compiled_once_per_lang(self):
+        calls = Mock(side_effect=loader)
+        matcher = VocabMatcher(calls, ("MiscBlacklist", "Weather"))
+        self.assertTrue(matcher.match("vai haver chuva", "pt-pt"))
+        self.assertTrue(matcher.match("qual a previsao", "pt-PT"))
+        self.assertFalse(matcher.match("will it rain", "pt-pt"))
+        self.assertFalse(matcher.match("anything", "de-de"))
+        self.assertEqual(calls.call_count, 4)
+        self.assertEqual(matcher.stats()["langs"], 2)
+        self.assertIn("pt-pt", matcher.stats()["compile_seconds"])
+
+        VOCAB[("Weather", "de-de")] = ["regen"]
+        try:
+            self.assertFalse(matcher.match("regen", "de-de"))
+            matcher.invalidate("de-de")
+            self.assertTrue(matcher.match("regen", "de-de"))
+        finally:
+            VOCAB.pop(("Weather", "de-de"))
+
+    def test_skill_decisions_dropped_on_invalidate(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.vocab_matcher.loader = Mock(side_effect=loader)
+        skill.vocab_matcher.invalidate()
+        self.assertFalse(skill.is_blacklisted("will it snow", "en-us"))
+        VOCAB[("Weather", "en-us")].append("snow")
+        try:
+            skill.vocab_matcher.invalidate("en-us")
+            self.assertTrue(skill.is_blacklisted("will it snow", "en-us"))
+        finally:
+            VOCAB[("Weather", "en-us")].remove("snow")
+            skill.shutdown()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import Mock
+
+from ovos_utils.messagebus import FakeBus
+from ovos_skill_ddg import DuckDuckGoSkill
+from ovos_skill_ddg.cache import QueryHistory
+
+
+class TestQueryHistory(unittest.TestCase):
+    def test_top_queries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "history.json")
+            history = QueryHistory(path, max_entries=2, flush_every=100)
+            for _ in range(3):
+                history.record("speed of light", "en-us", "metric")
+            history.record("Speed of Light", "en-us", "metric")
+            history.record("velocidade da luz", "pt-pt", "metric")
+            history.record("velocidade da luz", "pt-pt", "metric")
+            history.record("asdfgh", "en-us", "metric")
+            self.assertEqual(history.top(1), [("speed of light", "en-us", "metric")])
+            self.assertEqual(history.top(5, ["pt-PT"]), [("velocidade da luz", "pt-pt", "metric")])
+            history.save()
+
+            # only the most frequent queries are persisted
+            history = QueryHistory(path, max_entries=2)
+            self.assertEqual(history.top(5), [("speed of light", "en-us", "metric"),
+                                              ("velocidade da luz", "pt-pt", "metric")])
+
+    def test_flush(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = join(tmp, "history.json")
+            history = QueryHistory(path, flush_every=2)
+            history.record("speed of light", "en-us", "metric")
+            history.record("speed of light", "en-us", "metric")
+            self.assertEqual(QueryHistory(path).top(1), [("speed of light", "en-us", "metric")])
+
+
+class TestWarmup(unittest.TestCase):
+    def test_warmup_cache(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.duck.long_answer = Mock(return_value=[{"title": "t", "summary": "42"}])
+        with tempfile.TemporaryDirectory() as tmp:
+            skill.query_history = QueryHistory(join(tmp, "history.json"))
+            skill.query_history.record("speed of light", "en-us", "metric")
+            skill.query_history.record("velocidade da luz", "pt-pt", "metric")
+            skill.query_history.record("already cached", "en-us", "metric")
+            skill.answer_cache.put("already cached", "en-us", "metric", [{"summary": "1"}])
+            skill.settings["warmup_queries"] = 10
+            skill._stopping = Mock(wait=Mock(return_value=False))
+            try:
+                skill.warmup_cache()
+            finally:
+                skill.settings.pop("warmup_queries", None)
+                skill.query_history = None
+
+        # only configured languages, only what is not cached yet
+        skill.duck.long_answer.assert_called_once_with("speed of light", lang="en-us", units="metric")
+        self.assertTrue(skill.answer_cache.has("speed of light", "en-us", "metric"))
+
+    def test_waits_for_async_lookups(self):
+        skill = DuckDuckGoSkill(bus=FakeBus(), skill_id="ddg.test")
+        skill.engine = Mock(in_flight=Mock(side_effect=[2, 1, 0]))
+        skill.fetch_answer = Mock()
+        skill.query_history = Mock(top=Mock(return_value=[("speed of light", "en-us", "metric")]))
+        skill.settings["warmup_queries"] = 10
+        skill._stopping = Mock(wait=Mock(return_value=False))
+        try:
+            skill.warmup_cache()
+        finally:
+            skill.settings.pop("warmup_queries", None)
+            skill.query_history = skill.engine = None
+        # paused while live lookups were pending on the engine
+        self.assertEqual(skill._stopping.wait.call_count, 4)
+        skill.fetch_answer.assert_called_once_with("speed of light", "en-us", "metric")
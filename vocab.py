@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import re
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Pattern, Sequence
+
+from ovos_utils.log import LOG
+from ovos_utils.text_utils import remove_accents_and_punct
+
+
+class VocabMatcher:
+    """Match a phrase against several vocab files with one compiled regex.
+
+    Same result as `any(skill.voc_match(phrase, voc, lang) for voc in vocabs)`,
+    but the phrase is normalized once and scanned once. The regex is built
+    on first use per language, or ahead of time with `compile`, and only
+    rebuilt after `invalidate`.
+
+    `loader(voc_filename, lang)` returns the vocab samples, eg.
+    `OVOSSkill.voc_list`, `on_invalidate(lang)` is called after `invalidate`
+    so results cached elsewhere can be dropped too
+    """
+
+    def __init__(self, loader: Callable[[str, str], List[str]], vocabs: Sequence[str],
+                 on_invalidate: Optional[Callable[[Optional[str]], None]] = None):
+        self.loader = loader
+        self.vocabs = tuple(vocabs)
+        self.on_invalidate = on_invalidate
+        self._lock = Lock()
+        self._patterns: Dict[str, Optional[Pattern]] = {}
+        self.compile_seconds: Dict[str, float] = {}
+
+    def _samples(self, lang: str) -> List[str]:
+        samples = set()
+        for voc in self.vocabs:
+            try:
+                vocab = self.loader(voc, lang)
+            except FileNotFoundError:
+                LOG.warning(f"missing '{voc}' vocab for '{lang}'")
+                continue
+            samples.update(remove_accents_and_punct(v).strip() for v in vocab or [])
+        samples.discard("")
+        return sorted(samples, key=len, reverse=True)
+
+    def compile(self, lang: str) -> Optional[Pattern]:
+        """(re)build the pattern for `lang`, None if there is no vocab"""
+        start = time.perf_counter()
+        samples = self._samples(lang)
+        pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, samples)) + r")\b",
+                             re.IGNORECASE) if samples else None
+        with self._lock:
+            self._patterns[lang.lower()] = pattern
+            self.compile_seconds[lang.lower()] = time.perf_counter() - start
+        return pattern
+
+    def invalidate(self, lang: Optional[str] = None):
+        """drop compiled patterns after a vocab change, all languages by default"""
+        with self._lock:
+            if lang is None:
+                self._patterns.clear()
+            else:
+                self._patterns.pop(lang.lower(), None)
+        if self.on_invalidate:
+            self.on_invalidate(lang)
+
+    def match(self, phrase: str, lang: str) -> bool:
+        try:
+            pattern = self._patterns[lang.lower()]
+        except KeyError:
+            pattern = self.compile(lang)
+        if pattern is None or not phrase:
+            return False
+        return pattern.search(remove_accents_and_punct(phrase)) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"langs": len(self._patterns),
+                "compile_seconds": dict(self.compile_seconds)}